@@ -1,16 +1,21 @@
 import pandas as pd
 
-edstays = pd.read_csv('data/edstays.csv', parse_dates=['intime', 'outtime'])
-vitals = pd.read_csv('data/vitalsign.csv', parse_dates=['charttime'])
+# pyarrow parser; numeric vitals typed up front ('pain' is free text, coerced below)
+edstays = pd.read_csv('data/edstays.csv', engine='pyarrow', parse_dates=['intime', 'outtime'])
+vital_cols = ['temperature', 'heartrate', 'resprate', 'o2sat', 'sbp', 'dbp', 'pain']
+vitals = pd.read_csv('data/vitalsign.csv', engine='pyarrow', parse_dates=['charttime'],
+                     usecols=['subject_id', 'stay_id', 'charttime'] + vital_cols,
+                     dtype={'temperature': 'float32', 'heartrate': 'float32', 'resprate': 'float32',
+                            'o2sat': 'float32', 'sbp': 'float32', 'dbp': 'float32'})
 
 # Calculate ED length of stay and flag false admissions
 edstays['ed_los_hours'] = (edstays['outtime'] - edstays['intime']).dt.total_seconds() / 3600
 edstays['is_false_admission'] = edstays['ed_los_hours'] <= 12
 
-# Merge vitals with ED stay metadata
+# Merge vitals with the ED stay window (the flag is joined back via edstays below)
 vitals_merged = pd.merge(
     vitals,
-    edstays[['subject_id', 'stay_id', 'intime', 'outtime', 'is_false_admission']],
+    edstays[['subject_id', 'stay_id', 'intime', 'outtime']],
     on=['subject_id', 'stay_id'],
     how='inner'
 )
@@ -21,13 +26,12 @@ vitals_clean = vitals_merged[
     (vitals_merged['charttime'] <= vitals_merged['outtime'])
 ]
 
-# Convert to numeric
-vital_cols = ['temperature', 'heartrate', 'resprate', 'o2sat', 'sbp', 'dbp', 'pain']
+# Convert to numeric (float32 is ample for clinical ranges)
 for col in vital_cols:
-    vitals_clean[col] = pd.to_numeric(vitals_clean[col], errors='coerce')
+    vitals_clean[col] = pd.to_numeric(vitals_clean[col], errors='coerce', downcast='float')
 
-# Aggregate vitals
-vital_summary = vitals_clean.groupby(['subject_id', 'stay_id'])[vital_cols].mean().reset_index()
+# Aggregate vitals (group order is irrelevant: the result is left-merged onto edstays)
+vital_summary = vitals_clean.groupby(['subject_id', 'stay_id'], sort=False)[vital_cols].mean().reset_index()
 
 # Merge vitals into full ED data
 ed_merged = pd.merge(edstays, vital_summary, on=['subject_id', 'stay_id'], how='left')
@@ -39,6 +43,9 @@ ed_merged = ed_merged[
     (ed_merged['o2sat'] >= 50) & (ed_merged['o2sat'] <= 100)
 ]
 
-# Save full merged dataset
-ed_merged.to_csv('ed_merged.csv', index=False)
-print("Saved: ed_merged.csv")
+# Downcast LOS and IDs before saving
+ed_merged = ed_merged.astype({'ed_los_hours': 'float32', 'subject_id': 'int32', 'stay_id': 'int32'})
+
+# Save full merged dataset (Parquet keeps dtypes and allows column-subset reads)
+ed_merged.to_parquet('ed_merged.parquet', compression='zstd', index=False)
+print("Saved: ed_merged.parquet")
@@ -3,7 +3,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 
 # Load cleaned data
-ed_merged = pd.read_csv('ed_merged.csv')
+ed_merged = pd.read_parquet('ed_merged.parquet')
 
 # Filter false admissions
 filtered = ed_merged[ed_merged['is_false_admission']]
@@ -36,5 +36,5 @@ plot_clinical_dist(filtered, 'heartrate', bounds=[60, 100], xlabel='Heart Rate (
 plot_clinical_dist(filtered, 'o2sat', bounds=[92], xlabel='Oxygen Saturation (%)')
 
 # Save filtered false admissions
-filtered.to_csv('false_ed_with_cleaned_vitals.csv', index=False)
-print("Saved: false_ed_with_cleaned_vitals.csv")
\ No newline at end of file
+filtered.to_parquet('false_ed_with_cleaned_vitals.parquet', compression='zstd', index=False)
+print("Saved: false_ed_with_cleaned_vitals.parquet")
\ No newline at end of file
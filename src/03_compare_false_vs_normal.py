@@ -3,7 +3,8 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 
 # Load full merged dataset
-ed_merged = pd.read_csv('ed_merged.csv')
+ed_merged = pd.read_parquet('ed_merged.parquet',
+                            columns=['is_false_admission', 'heartrate', 'o2sat', 'disposition'])
 
 # Style
 sns.set_context("paper", font_scale=1.4)
@@ -2,6 +2,8 @@
 
 import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from pathlib import Path
 
 
@@ -19,6 +21,7 @@ STRICT_BOTH = os.environ.get("STRICT_BOTH", "1") not in {"0","false","False"}
 def read_table(basename, parse_dates=None, usecols=None, required=True):
     """
     Read DATA/{basename}.csv.gz if present, else .csv.
+    Uses the multithreaded pyarrow CSV parser.
     """
     gz = DATA / f"{basename}.csv.gz"
     cs = DATA / f"{basename}.csv"
@@ -29,7 +32,7 @@ def read_table(basename, parse_dates=None, usecols=None, required=True):
             raise FileNotFoundError(msg)
         print("WARN:", msg)
         return None
-    return pd.read_csv(path, parse_dates=parse_dates, usecols=usecols)
+    return pd.read_csv(path, engine="pyarrow", parse_dates=parse_dates, usecols=usecols)
 
 # Load data
 ed  = read_table("edstays",   parse_dates=["intime","outtime"])
@@ -112,30 +115,32 @@ def clean_race_column(df):
     }
     
     # Apply the mapping
-    df['race_cleaned'] = df['race'].map(race_mapping)
-    
+    orig = df['race']
+    mapped = orig.map(race_mapping)
+
     # Handle any unmapped values
-    unmapped = df[df['race_cleaned'].isna() & df['race'].notna()]['race'].unique()
-    if len(unmapped) > 0:
-        print(f"Warning: Unmapped race values found: {unmapped}")
-        # Map unmapped values to 'Other'
-        df.loc[df['race_cleaned'].isna() & df['race'].notna(), 'race_cleaned'] = 'Other'
-    
-    # Replace original race column
-    df['race'] = df['race_cleaned']
-    df = df.drop('race_cleaned', axis=1)
-    
+    unmapped = mapped.isna() & orig.notna()
+    if unmapped.any():
+        print(f"Warning: Unmapped race values found: {orig[unmapped].unique()}")
+
+    # Map unmapped values to 'Other', keep missing race as NaN
+    df['race'] = mapped.where(orig.isna(), mapped.fillna('Other'))
+
     return df
 
 # Clean race data
 print("Cleaning race data...")
 df = clean_race_column(df)
+
+# Low-cardinality text columns -> category (integer codes, faster groupby)
+for c in ["race","sex","gender","disposition"]:
+    if c in df.columns:
+        df[c] = df[c].astype("category")
+
 if "race" in df.columns:
     race_counts = df['race'].value_counts()
     print(f"Race categories after cleaning: {len(race_counts)}")
-    for race, count in race_counts.items():
-        print(f"  {race}: {count:,}")
-    print()
+    print("\n".join(f"  {race}: {count:,}" for race, count in race_counts.items()) + "\n")
 
 # Build robust index cohort (true ED discharges)
 # Focus on ED visits that did NOT result in hospital admission
@@ -148,45 +153,45 @@ text_cols = [c for c in ["disposition","edoutcome","outcome","ed_disposition"] i
 # Exclude obvious non-discharges if text available: AMA/LWBS/eloped/transfer/death/hospice
 exclude_pat = r"ama|left\s*without|lwbs|elope|transfer|expired|death|deceased|died|hospice"
 if text_cols:
-    bad_outcome = False
-    for c in text_cols:
-        bad_outcome = bad_outcome | df[c].astype(str).str.contains(exclude_pat, case=False, na=False)
+    # join the text columns row-wise and run Arrow's RE2 kernel once;
+    # the " | " separator can't complete any alternative in exclude_pat
+    combined = pc.binary_join_element_wise(*[pa.array(df[c].astype(str)) for c in text_cols], " | ")
+    hits = pc.match_substring_regex(combined, exclude_pat, ignore_case=True)
+    bad_outcome = pd.Series(hits.to_numpy(zero_copy_only=False), index=df.index)
 else:
     bad_outcome = False  # no text to exclude
 
 idx = df[not_admitted_from_ed & has_outtime & ~bad_outcome].copy()
 
 # QA: cohort construction
-print("\n[QA] index cohort (true ED discharges)")
-print(f"DATA_DIR={os.environ.get('DATA_DIR','data')}  W_DAYS={W_DAYS}  TOL_MINUTES={TOL_MINUTES}  STRICT_BOTH={STRICT_BOTH}")
-print(f"all ED rows:                              {len(df):,}")
-print(f"hadm_id is NA (not admitted from ED):     {not_admitted_from_ed.sum():,}")
-print(f"has outtime:                              {has_outtime.sum():,}")
+qa_lines = [
+    "\n[QA] index cohort (true ED discharges)",
+    f"DATA_DIR={os.environ.get('DATA_DIR','data')}  W_DAYS={W_DAYS}  TOL_MINUTES={TOL_MINUTES}  STRICT_BOTH={STRICT_BOTH}",
+    f"all ED rows:                              {len(df):,}",
+    f"hadm_id is NA (not admitted from ED):     {not_admitted_from_ed.sum():,}",
+    f"has outtime:                              {has_outtime.sum():,}",
+]
 if text_cols:
-    print(f"excluded via outcome text ({', '.join(text_cols)}): {int(bad_outcome.sum()):,}")
-print(f"INDEX DISCHARGES USED (idx):              {len(idx):,}\n")
+    qa_lines.append(f"excluded via outcome text ({', '.join(text_cols)}): {int(bad_outcome.sum()):,}")
+qa_lines.append(f"INDEX DISCHARGES USED (idx):              {len(idx):,}\n")
+print("\n".join(qa_lines))
 
 # A) ED BOUNCE-BACK (ED revisit within W_DAYS)
-# Sort by subject_id and outtime to get proper discharge sequence
-idx = idx.sort_values(["subject_id","outtime"])
+# Sort once by outtime (the as-of key) with a positional index; sections A-C
+# and the strict check all reuse this layout without re-sorting or realigning
+idx = idx.sort_values(["outtime","subject_id"]).reset_index(drop=True)
 
 # For each ED discharge, find the next ED arrival that occurs AFTER the discharge
-def find_next_ed_visit(group):
-    group = group.sort_values("outtime")
-    group["returned_W"] = False
-    
-    for i in range(len(group)):
-        current_outtime = group.iloc[i]["outtime"]
-        # Look for future visits (after current discharge)
-        future_visits = group[group["intime"] > current_outtime]
-        if not future_visits.empty:
-            next_visit_time = future_visits["intime"].min()
-            days_to_next = (next_visit_time - current_outtime).total_seconds() / 86400.0
-            if 0 <= days_to_next <= W_DAYS:
-                group.iloc[i, group.columns.get_loc("returned_W")] = True
-    return group
-
-idx = idx.groupby("subject_id").apply(find_next_ed_visit).droplevel(0)
+# (forward as-of search per patient; strictly later than outtime)
+arrivals = (idx[["subject_id","intime"]].dropna(subset=["intime"])
+                .rename(columns={"intime": "next_intime"})
+                .sort_values("next_intime"))
+next_visit = pd.merge_asof(idx[["subject_id","outtime"]], arrivals,
+                           left_on="outtime", right_on="next_intime", by="subject_id",
+                           direction="forward", allow_exact_matches=False)
+idx["next_intime"] = next_visit["next_intime"].to_numpy()
+days_to_next = (idx["next_intime"] - idx["outtime"]).dt.total_seconds() / 86400.0
+idx["returned_W"] = days_to_next.between(0, W_DAYS)
 
 den_ed_revisit = len(idx)
 num_ed_revisit = int(idx["returned_W"].sum())
@@ -207,10 +212,9 @@ if adm is not None:
     # Apply the window filter, but respect the tolerance for slightly negative times
     join = join[join["days_to_admit"].between(-TOL_MINUTES/1440.0, W_DAYS)]  # convert minutes to days
 
-    earliest = (join.sort_values(["stay_id","admittime"])
-                    .drop_duplicates("stay_id", keep="first"))
-
-    idx["readmit_W"] = idx["stay_id"].isin(earliest["stay_id"])
+    # any admission left in the window flags the stay; only membership is needed,
+    # so there is no need to sort/dedupe down to the earliest admission
+    idx["readmit_W"] = idx["stay_id"].isin(join["stay_id"])
 else:
     idx["readmit_W"] = False  # admissions not available
 
@@ -237,44 +241,21 @@ print(f"  neither:                   {neither_std} ({(neither_std/den):.2%})")
 # Strict "both": admission must occur AFTER the ED revisit arrival
 # For the strict definition, we need to find the actual next ED visit time for those who returned
 if STRICT_BOTH and adm is not None:
-    # For patients who had an ED revisit, find the actual time of their next visit
-    revisit_times = []
-    
-    for _, row in idx[idx["returned_W"]].iterrows():
-        subject_id = row["subject_id"]
-        current_outtime = row["outtime"]
-        
-        # Find future ED visits for this patient after current discharge
-        future_visits = idx[(idx["subject_id"] == subject_id) & 
-                           (idx["intime"] > current_outtime)]
-        
-        if not future_visits.empty:
-            next_visit_time = future_visits["intime"].min()
-            revisit_times.append({
-                "subject_id": subject_id,
-                "stay_id": row["stay_id"], 
-                "next_intime": next_visit_time
-            })
-    
-    if revisit_times:
-        rev_df = pd.DataFrame(revisit_times)
-        
-        # Join to the admissions that are already after outtime and within W_DAYS
-        j_strict = rev_df.merge(
-            join[["subject_id","stay_id","admittime"]],
-            on=["subject_id","stay_id"],
-            how="left"
-        )
-        # admission must be on/after the revisit arrival
-        j_strict = j_strict[j_strict["admittime"].notna() & 
-                           (j_strict["admittime"] >= j_strict["next_intime"])]
-        
-        # keep earliest admission per index stay (in case of multiple)
-        j_strict = j_strict.sort_values(["stay_id","admittime"]).drop_duplicates("stay_id", keep="first")
-        
-        both_strict = int(j_strict["stay_id"].nunique())
-    else:
-        both_strict = 0
+    # For patients who had an ED revisit, the time of their next visit is next_intime (from A)
+    rev_df = idx.loc[idx["returned_W"], ["subject_id","stay_id","next_intime"]]
+
+    # Join to the admissions that are already after outtime and within W_DAYS
+    j_strict = rev_df.merge(
+        join[["subject_id","stay_id","admittime"]],
+        on=["subject_id","stay_id"],
+        how="left"
+    )
+    # admission must be on/after the revisit arrival
+    j_strict = j_strict[j_strict["admittime"].notna() &
+                       (j_strict["admittime"] >= j_strict["next_intime"])]
+
+    # count index stays (nunique collapses multiple qualifying admissions)
+    both_strict = int(j_strict["stay_id"].nunique())
     ed_only_strict = int(idx["returned_W"].sum() - both_strict)
     adm_only_strict = int((~idx["returned_W"] & idx["readmit_W"]).sum())
     neither_strict  = int(len(idx) - (both_strict + ed_only_strict + adm_only_strict))
@@ -285,95 +266,92 @@ if STRICT_BOTH and adm is not None:
     print(f"  admit only:                {adm_only_strict} ({(adm_only_strict/len(idx)):.2%})")
     print(f"  neither:                   {neither_strict} ({(neither_strict/len(idx)):.2%})")
 
+def write_summary(df, name, index=True):
+    """Write a summary table as CSV plus a Parquet copy that 07-09 read without re-parsing."""
+    df.to_csv(CSV_OUT / name, index=index)
+    df.to_parquet((CSV_OUT / name).with_suffix(".parquet"), engine="pyarrow",
+                  compression="zstd", index=index)
+
 # Save overlap summaries
-pd.DataFrame({
+write_summary(pd.DataFrame({
     "category": ["both","ed_only","admit_only","neither"],
     "count":    [both_std, ed_only_std, bb_only_std, neither_std],
     "rate":     [both_std/den if den else float("nan"),
                  ed_only_std/den if den else float("nan"),
                  bb_only_std/den if den else float("nan"),
                  neither_std/den if den else float("nan")]
-}).to_csv(CSV_OUT / "overlap_standard.csv", index=False)
+}), "overlap_standard.csv", index=False)
 
 if STRICT_BOTH and adm is not None:
-    pd.DataFrame({
+    write_summary(pd.DataFrame({
         "category": ["both_strict","ed_only_strict","admit_only","neither_strict"],
         "count":    [both_strict, ed_only_strict, adm_only_strict, neither_strict],
         "rate":     [both_strict/den if den else float("nan"),
                      ed_only_strict/den if den else float("nan"),
                      adm_only_strict/den if den else float("nan"),
                      neither_strict/den if den else float("nan")]
-    }).to_csv(CSV_OUT / "overlap_strict_revisit_then_admit.csv", index=False)
+    }), "overlap_strict_revisit_then_admit.csv", index=False)
 
 # D) Grouped summaries 
-def group_rate(frame, flag, by, out_name):
-    g = frame.groupby(by, dropna=False).agg(n=(flag,"sum"), d=(flag,"size"))
-    g["rate"] = g["n"] / g["d"]
-    g.to_csv(CSV_OUT / out_name)
+def group_rate(frame, by, ed_out_name, readmit_out_name):
+    """
+    Write n/d/rate per group for both outcome flags from one groupby pass.
+    """
+    g = frame.groupby(by, dropna=False, observed=True)[["returned_W","readmit_W"]].agg(["sum","size"])
+    for flag, out_name in (("returned_W", ed_out_name), ("readmit_W", readmit_out_name)):
+        r = g[flag].rename(columns={"sum": "n", "size": "d"})
+        r["rate"] = r["n"] / r["d"]
+        write_summary(r, out_name)
 
 # time trend by month of ED discharge
-idx["month"] = idx["outtime"].dt.strftime("%Y-%m")
-group_rate(idx, "returned_W", "month", "ed_bounceback_monthly.csv")
-group_rate(idx, "readmit_W",  "month", "readmit_monthly.csv")
+idx["month"] = idx["outtime"].dt.strftime("%Y-%m").astype("category")
+group_rate(idx, "month", "ed_bounceback_monthly.csv", "readmit_monthly.csv")
 
 # age groups (if age exists)
 if "age" in idx.columns:
     bins = [0,18,35,50,65,80,200]; labels = ["0-17","18-34","35-49","50-64","65-79","80+"]
     idx["age_group"] = pd.cut(idx["age"], bins=bins, labels=labels, right=False)
-    group_rate(idx, "returned_W", "age_group", "ed_bounceback_by_age.csv")
-    group_rate(idx, "readmit_W",  "age_group", "readmit_by_age.csv")
+    group_rate(idx, "age_group", "ed_bounceback_by_age.csv", "readmit_by_age.csv")
 
 # sex
 if "sex" in idx.columns:
-    group_rate(idx, "returned_W", "sex", "ed_bounceback_by_sex.csv")
-    group_rate(idx, "readmit_W",  "sex", "readmit_by_sex.csv")
+    group_rate(idx, "sex", "ed_bounceback_by_sex.csv", "readmit_by_sex.csv")
 
 # race
 if "race" in idx.columns:
-    group_rate(idx, "returned_W", "race", "ed_bounceback_by_race.csv")
-    group_rate(idx, "readmit_W",  "race", "readmit_by_race.csv")
+    group_rate(idx, "race", "ed_bounceback_by_race.csv", "readmit_by_race.csv")
 
 # by diagnosis (prefer grouped column if present)
 dx_col = "icd_group" if "icd_group" in idx.columns else ("icd_code" if "icd_code" in idx.columns else None)
 if dx_col:
-    group_rate(idx, "returned_W", dx_col, "ed_bounceback_by_diagnosis.csv")
-    group_rate(idx, "readmit_W",  dx_col, "readmit_by_diagnosis.csv")
+    group_rate(idx, dx_col, "ed_bounceback_by_diagnosis.csv", "readmit_by_diagnosis.csv")
 
 print("\nsaved CSV summaries in csv_outputs/ (where grouping columns exist).")
 
 # Generate visualizations
 print("\nGenerating visualizations...")
+import importlib.util
+
+def run_script(filename, entry):
+    """Load a sibling script by path (names start with a digit) and call its entry point."""
+    spec = importlib.util.spec_from_file_location(Path(filename).stem, Path(__file__).with_name(filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    getattr(module, entry)()
+
+# Run the visualization script in this interpreter (pandas/matplotlib already loaded)
 try:
-    import subprocess
-    import sys
-    
-    # Run the visualization script
-    result = subprocess.run([sys.executable, "src/06_visualize_bounce_back.py"], 
-                          capture_output=True, text=True, cwd=".")
-    
-    if result.returncode == 0:
-        print("✓ Visualizations generated successfully")
-        if result.stdout:
-            print(result.stdout)
-    else:
-        print("⚠ Error generating visualizations:")
-        if result.stderr:
-            print(result.stderr)
-    
-    # Generate summary report
-    print("\nGenerating summary report...")
-    report_result = subprocess.run([sys.executable, "src/07_generate_report.py"], 
-                                 capture_output=True, text=True, cwd=".")
-    
-    if report_result.returncode == 0:
-        print(report_result.stdout)
-    else:
-        print("⚠ Error generating report")
-        if report_result.stderr:
-            print(report_result.stderr)
-        
+    run_script("06_visualize_bounce_back.py", "main")
+    print("✓ Visualizations generated successfully")
 except ImportError as e:
     print(f"⚠ Could not generate visualizations: {e}")
     print("  Install matplotlib and seaborn to enable visualization generation")
 except Exception as e:
-    print(f"⚠ Error running visualization script: {e}")
+    print(f"⚠ Error generating visualizations: {e}")
+
+# Generate summary report (runs even if the plots failed)
+print("\nGenerating summary report...")
+try:
+    run_script("07_generate_report.py", "generate_report")
+except Exception as e:
+    print(f"⚠ Error generating report: {e}")
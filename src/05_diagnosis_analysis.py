@@ -1,25 +1,36 @@
+import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 
 # Load diagnosis and ED merged data
-dx = pd.read_csv('data/diagnosis.csv') 
-ed = pd.read_csv('data/ed_merged.csv')
-bounces = pd.read_csv('data/false_admissions_with_bouncebacks.csv')
+dx = pd.read_csv('data/diagnosis.csv', engine='pyarrow',
+                 usecols=['stay_id', 'icd_code'], dtype={'icd_code': str})
+ed = pd.read_parquet('data/ed_merged.parquet',
+                     columns=['subject_id', 'stay_id', 'hadm_id', 'is_false_admission'])
+bounces = pd.read_csv('data/false_admissions_with_bouncebacks.csv', engine='pyarrow',
+                      usecols=['subject_id', 'stay_id'])
 
 # Prepare diagnosis codes
-dx['icd_prefix'] = dx['icd_code'].astype(str).str[:3]
+dx['icd_prefix'] = dx['icd_code'].astype(str).str[:3].astype('category')
 
 # Filter to only false admissions
 false_admits = ed[ed['is_false_admission'] & ed['stay_id'].notna()]
 false_admits = false_admits[['subject_id', 'stay_id', 'hadm_id']].dropna()
 
-# Join diagnoses for false admissions
-dx_false = pd.merge(dx, false_admits, on='stay_id', how='inner')
+# Keep diagnoses for false admissions; only hadm_id is needed from the ED side
+fa_hadm = false_admits.drop_duplicates('stay_id').set_index('stay_id')['hadm_id']
+dx_false = dx[dx['stay_id'].isin(fa_hadm.index)].copy()
+dx_false['hadm_id'] = dx_false['stay_id'].map(fa_hadm)
 
 # get top ICD code groups among false admits
-top_icd = dx_false['icd_prefix'].value_counts().head(10).index.tolist()
-top_dx_false = dx_false[dx_false['icd_prefix'].isin(top_icd)]
+prefix_codes = dx_false['icd_prefix'].cat.codes.to_numpy()
+prefix_counts = np.bincount(prefix_codes[prefix_codes >= 0],
+                            minlength=len(dx_false['icd_prefix'].cat.categories))
+top_codes = np.argsort(-prefix_counts, kind='stable')[:10]
+top_codes = top_codes[prefix_counts[top_codes] > 0]
+top_icd = dx_false['icd_prefix'].cat.categories[top_codes].tolist()
+top_dx_false = dx_false[np.isin(prefix_codes, top_codes)]
 
 # Join bounce-back info
 bounces['bounceback'] = True
@@ -33,7 +44,7 @@ false_annotated = pd.merge(false_admits, icd_labels, on='hadm_id', how='left')
 false_annotated = false_annotated[false_annotated['icd_prefix'].isin(top_icd)]
 
 # bounce-back rate per top ICD prefix
-summary = false_annotated.groupby('icd_prefix')['bounceback'].agg(['count', 'sum']).reset_index()
+summary = false_annotated.groupby('icd_prefix', observed=True)['bounceback'].agg(['count', 'sum']).reset_index()
 summary['bounce_rate'] = summary['sum'] / summary['count']
 
 # map ICD prefixes to human-readable descriptions
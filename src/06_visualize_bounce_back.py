@@ -1,21 +1,96 @@
 # src/06_visualize_bounce_back.py
 
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # PNG output only; no GUI backend needed
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-import seaborn as sns
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+import io
 import os
+from _io_cache import (FIG_DPI, figure_status, filter_meaningful, is_up_to_date, load_summary,
+                       record_fingerprint)
 
-# Set style
+# Set style (every plot passes explicit colors, so no seaborn palette is needed)
 plt.style.use('default')
-sns.set_palette("husl")
+plt.rcParams.update({
+    'axes.unicode_minus': False,
+    'path.simplify': True,
+    'path.simplify_threshold': 1.0,
+    'agg.path.chunksize': 10000,
+})
+# All labels here are plain text: skip the mathtext parse of every string
+# (text.parse_math only exists from matplotlib 3.6; requirements allow 3.5)
+if 'text.parse_math' in plt.rcParams:
+    plt.rcParams['text.parse_math'] = False
 
 # Paths
 FIGURES = Path("figures")
 CSV_DIR = Path("csv_outputs")
 OUT = FIGURES  # Save plots in figures directory
+# Part of every figure's fingerprint, so editing this script redraws its figures
+SCRIPT = Path(__file__)
+# Summary CSVs present at start-up: one directory scan instead of an exists() probe per file
+AVAILABLE_CSVS = ({e.name for e in os.scandir(CSV_DIR) if e.is_file()}
+                  if CSV_DIR.is_dir() else set())
+
+# Short race labels, keyed on the cleaned categories from 04_bounce_back.py
+RACE_SHORT_DETAIL = {
+    "American Indian or Alaska Native": "American Indian/\nAlaska Native",
+    "Native Hawaiian or Pacific Islander": "Native Hawaiian/\nPacific Islander",
+    "Black or African American": "Black or\nAfrican American",
+}
+RACE_SHORT_DASH = {
+    "American Indian or Alaska Native": "AI/AN",
+    "Native Hawaiian or Pacific Islander": "NH/PI",
+    "Black or African American": "Black",
+    "Hispanic or Latino": "Hispanic",
+    "White": "White",
+    "Asian": "Asian",
+    "Other": "Other",
+    "Unknown": "Unknown",
+}
+
+MONTH_LABELS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+PIE_COLORS_STD = ('#ff9999', '#66b3ff', '#99ff99', '#ffcc99')
+PIE_COLORS_STRICT = ('#ff6b6b', '#4ecdc4', '#45b7d1', '#f9ca24')
+
+# Columns actually used from the monthly summaries written by 04_bounce_back.py
+MONTHLY_COLS = ('month', 'rate')
+
+# FIG_DPI (150 by default) with fast zlib is plenty for analysis figures and encodes several times faster
+SAVE_KW = dict(dpi=FIG_DPI, bbox_inches='tight', metadata={'Software': None},
+               pil_kwargs={'compress_level': 1, 'optimize': False})
+
+def save_figure(fig, path):
+    """Save a figure as PNG with the shared SAVE_KW settings.
+
+    The PNG is encoded into memory and written to disk with a single raw write.
+    """
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', **SAVE_KW)
+    data = buf.getbuffer()
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        written = 0
+        while written < len(data):
+            written += os.write(fd, data[written:])
+    finally:
+        os.close(fd)
+
+def reuse_axes(figures, figsize):
+    """Return a (fig, ax) of `figsize` from `figures`, clearing an existing one instead of re-creating it"""
+    if figsize in figures:
+        fig, ax = figures[figsize]
+        ax.cla()
+    else:
+        fig, ax = figures[figsize] = plt.subplots(figsize=figsize)
+    plt.sca(ax)
+    return fig, ax
 
 def create_figure_with_subtitle(title, subtitle="", figsize=(10, 6)):
     """Create a figure with title and subtitle"""
@@ -27,94 +102,101 @@ def create_figure_with_subtitle(title, subtitle="", figsize=(10, 6)):
     return fig, ax
 
 def load_and_plot_overlap():
-    """Plot overlap between ED revisit and bounce back"""
+    """Plot overlap between ED revisit and bounce back; returns False if nothing needed redrawing"""
+    rendered = False
     # Standard overlap
-    if (CSV_DIR / "overlap_standard.csv").exists():
-        df_std = pd.read_csv(CSV_DIR / "overlap_standard.csv")
+    std_csv = CSV_DIR / "overlap_standard.csv"
+    if std_csv.name in AVAILABLE_CSVS and not is_up_to_date(OUT / "overlap_standard_visualization.png", std_csv, SCRIPT):
+        df_std = load_summary(CSV_DIR / "overlap_standard.csv")
+        rate_pct = df_std['rate'].to_numpy() * 100.0
         
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
         
         # Pie chart
-        colors = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99']
-        wedges, texts, autotexts = ax1.pie(df_std['count'], labels=df_std['category'], 
-                                          autopct='%1.1f%%', colors=colors, startangle=90)
+        ax1.pie(df_std['count'], labels=df_std['category'], 
+                autopct='%1.1f%%', colors=PIE_COLORS_STD, startangle=90)
         ax1.set_title('Standard Overlap: ED Revisit vs Bounce Back')
         
         # Bar chart with rates
-        bars = ax2.bar(df_std['category'], df_std['rate']*100, color=colors)
+        bars = ax2.bar(df_std['category'], rate_pct, color=PIE_COLORS_STD)
         ax2.set_title('Rates by Category')
         ax2.set_ylabel('Percentage (%)')
         ax2.set_xlabel('Category')
         plt.setp(ax2.get_xticklabels(), rotation=45, ha='right')
         
         # Add value labels on bars
-        for bar, rate in zip(bars, df_std['rate']*100):
-            height = bar.get_height()
-            ax2.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                    f'{rate:.1f}%', ha='center', va='bottom')
+        ax2.bar_label(bars, labels=[f'{rate:.1f}%' for rate in rate_pct], padding=3)
         
         plt.tight_layout()
-        plt.savefig(OUT / "overlap_standard_visualization.png", dpi=300, bbox_inches='tight')
-        plt.close()
+        save_figure(fig, OUT / "overlap_standard_visualization.png")
+        record_fingerprint(OUT / "overlap_standard_visualization.png", std_csv, SCRIPT)
+        plt.close(fig)
+        rendered = True
     
     # Strict overlap (if exists)
-    if (CSV_DIR / "overlap_strict_revisit_then_admit.csv").exists():
-        df_strict = pd.read_csv(CSV_DIR / "overlap_strict_revisit_then_admit.csv")
+    strict_csv = CSV_DIR / "overlap_strict_revisit_then_admit.csv"
+    if strict_csv.name in AVAILABLE_CSVS and not is_up_to_date(OUT / "overlap_strict_visualization.png", strict_csv, SCRIPT):
+        df_strict = load_summary(CSV_DIR / "overlap_strict_revisit_then_admit.csv")
+        rate_pct = df_strict['rate'].to_numpy() * 100.0
         
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
         
-        colors = ['#ff6b6b', '#4ecdc4', '#45b7d1', '#f9ca24']
-        wedges, texts, autotexts = ax1.pie(df_strict['count'], labels=df_strict['category'], 
-                                          autopct='%1.1f%%', colors=colors, startangle=90)
+        ax1.pie(df_strict['count'], labels=df_strict['category'], 
+                autopct='%1.1f%%', colors=PIE_COLORS_STRICT, startangle=90)
         ax1.set_title('Strict Overlap: Revisit → Then Admit')
         
-        bars = ax2.bar(df_strict['category'], df_strict['rate']*100, color=colors)
+        bars = ax2.bar(df_strict['category'], rate_pct, color=PIE_COLORS_STRICT)
         ax2.set_title('Rates by Category (Strict Definition)')
         ax2.set_ylabel('Percentage (%)')
         ax2.set_xlabel('Category')
         plt.setp(ax2.get_xticklabels(), rotation=45, ha='right')
         
-        for bar, rate in zip(bars, df_strict['rate']*100):
-            height = bar.get_height()
-            ax2.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                    f'{rate:.1f}%', ha='center', va='bottom')
+        ax2.bar_label(bars, labels=[f'{rate:.1f}%' for rate in rate_pct], padding=3)
         
         plt.tight_layout()
-        plt.savefig(OUT / "overlap_strict_visualization.png", dpi=300, bbox_inches='tight')
-        plt.close()
+        save_figure(fig, OUT / "overlap_strict_visualization.png")
+        record_fingerprint(OUT / "overlap_strict_visualization.png", strict_csv, SCRIPT)
+        plt.close(fig)
+        rendered = True
+    return rendered
 
 def plot_time_trends():
-    """Plot monthly trends for ED revisits and bounce back admissions"""
+    """Plot monthly trends for ED revisits and bounce back admissions; returns False if up to date"""
     ed_monthly = CSV_DIR / "ed_bounceback_monthly.csv"
     readmit_monthly = CSV_DIR / "readmit_monthly.csv"
+    if is_up_to_date(OUT / "monthly_trends.png", ed_monthly, readmit_monthly, SCRIPT):
+        return False
     
-    if ed_monthly.exists() and readmit_monthly.exists():
-        df_ed = pd.read_csv(ed_monthly)
-        df_readmit = pd.read_csv(readmit_monthly)
+    if ed_monthly.name in AVAILABLE_CSVS and readmit_monthly.name in AVAILABLE_CSVS:
+        df_ed = load_summary(ed_monthly, usecols=MONTHLY_COLS).copy()
+        df_readmit = load_summary(readmit_monthly, usecols=MONTHLY_COLS).copy()
         
         # Convert the month column to proper datetime
-        # Handle the MIMIC-IV shifted dates by mapping to normal years for visualization
-        df_ed['month_date'] = pd.to_datetime(df_ed['month'])
-        df_readmit['month_date'] = pd.to_datetime(df_readmit['month'])
-        
-        # Shift years to normal range for better visualization (2110 -> 2021, etc.)
-        df_ed['month_date'] = df_ed['month_date'] - pd.DateOffset(years=89)  # 2110 -> 2021
-        df_readmit['month_date'] = df_readmit['month_date'] - pd.DateOffset(years=89)
-        
-    # Sort by date to ensure proper chronological order
-    df_ed = df_ed.sort_values('month_date')
-    df_readmit = df_readmit.sort_values('month_date')
+        # Handle the MIMIC-IV shifted dates by mapping to normal years for visualization:
+        # shift the year on the "YYYY-MM" string (2110 -> 2021, etc.) and parse once,
+        # rather than subtracting a per-element DateOffset
+        for d in (df_ed, df_readmit):
+            shifted_year = d['month'].str.slice(0, 4).astype(int).sub(89).astype(str)
+            d['month_date'] = pd.to_datetime(shifted_year + '-' + d['month'].str.slice(5, 7) + '-01',
+                                             format='%Y-%m-%d', cache=True)
+        
+    # Sort by date to ensure proper chronological order ("YYYY-MM" sorts lexically);
+    # 04 writes the monthly CSVs in order, so this is normally skipped
+    if not df_ed['month'].is_monotonic_increasing:
+        df_ed = df_ed.sort_values('month')
+    if not df_readmit['month'].is_monotonic_increasing:
+        df_readmit = df_readmit.sort_values('month')
     # Filter for 2016-2025
     start = pd.Timestamp('2016-01-01')
     end = pd.Timestamp('2025-12-31')
     df_ed = df_ed[(df_ed['month_date'] >= start) & (df_ed['month_date'] <= end)]
     df_readmit = df_readmit[(df_readmit['month_date'] >= start) & (df_readmit['month_date'] <= end)]
 
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10))
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10), sharex=True)
 
     # ED revisit trend
     ax1.plot(df_ed['month_date'], df_ed['rate']*100, marker='o', linewidth=2, 
-         markersize=4, color='#e74c3c', label='ED Revisit Rate')
+         markersize=4, color='#e74c3c', label='ED Revisit Rate', rasterized=True)
     ax1.set_title('Monthly ED Revisit Rate Trend', fontweight='bold', fontsize=14)
     ax1.set_ylabel('Revisit Rate (%)', fontsize=12)
     ax1.grid(True, alpha=0.3)
@@ -122,33 +204,37 @@ def plot_time_trends():
 
     # Bounce back trend
     ax2.plot(df_readmit['month_date'], df_readmit['rate']*100, marker='s', linewidth=2, 
-         markersize=4, color='#3498db', label='Bounce Back Admission Rate')
+         markersize=4, color='#3498db', label='Bounce Back Admission Rate', rasterized=True)
     ax2.set_title('Monthly Bounce Back Admission Rate Trend', fontweight='bold', fontsize=14)
     ax2.set_ylabel('Bounce Back Admission Rate (%)', fontsize=12)
     ax2.set_xlabel('Date', fontsize=12)
     ax2.grid(True, alpha=0.3)
     ax2.legend()
 
-    # Format x-axis for both plots
+    # Format the shared x-axis once; only the bottom plot shows tick labels
     from matplotlib.dates import DateFormatter, YearLocator, MonthLocator
 
     # Set major ticks to show every few months for readability
+    ax2.xaxis.set_major_locator(MonthLocator(interval=6))  # Every 6 months
+    ax2.xaxis.set_minor_locator(MonthLocator(interval=3))  # Every 3 months
+    ax2.xaxis.set_major_formatter(DateFormatter('%b %Y'))  # e.g., "Jan 2021"
+    # Rotate labels and improve spacing
+    plt.setp(ax2.xaxis.get_majorticklabels(), rotation=45, ha='right')
+
     for ax in [ax1, ax2]:
-        ax.xaxis.set_major_locator(MonthLocator(interval=6))  # Every 6 months
-        ax.xaxis.set_minor_locator(MonthLocator(interval=3))  # Every 3 months
-        ax.xaxis.set_major_formatter(DateFormatter('%b %Y'))  # e.g., "Jan 2021"
-        # Rotate labels and improve spacing
-        plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
         # Set reasonable y-axis limits
         y_max = max(ax.get_ylim()[1], 15)  # At least 15% for scale
         ax.set_ylim(0, y_max)
 
     # Add summary statistics as text
-    ed_avg = df_ed['rate'].mean() * 100
-    ed_trend = "increasing" if df_ed['rate'].iloc[-12:].mean() > df_ed['rate'].iloc[:12].mean() else "decreasing"
+    # (monthly rates are never NaN: every month row has at least one discharge)
+    r_ed = df_ed['rate'].to_numpy()
+    ed_avg = r_ed.mean() * 100
+    ed_trend = "increasing" if r_ed[-12:].mean() > r_ed[:12].mean() else "decreasing"
 
-    readmit_avg = df_readmit['rate'].mean() * 100
-    readmit_trend = "increasing" if df_readmit['rate'].iloc[-12:].mean() > df_readmit['rate'].iloc[:12].mean() else "decreasing"
+    r_rd = df_readmit['rate'].to_numpy()
+    readmit_avg = r_rd.mean() * 100
+    readmit_trend = "increasing" if r_rd[-12:].mean() > r_rd[:12].mean() else "decreasing"
 
     # Add text boxes with summary info
     ax1.text(0.02, 0.98, f'Avg: {ed_avg:.1f}%\nTrend: {ed_trend}', 
@@ -160,183 +246,168 @@ def plot_time_trends():
         bbox=dict(boxstyle='round,pad=0.3', facecolor='white', alpha=0.8))
 
     plt.tight_layout()
-    plt.savefig(OUT / "monthly_trends.png", dpi=300, bbox_inches='tight')
-    plt.close()
+    save_figure(fig, OUT / "monthly_trends.png")
+    record_fingerprint(OUT / "monthly_trends.png", ed_monthly, readmit_monthly, SCRIPT)
+    plt.close(fig)
+    return True
 
-def plot_demographic_comparisons():
-    """Plot demographic breakdowns for revisit and bounce back rates"""
+# (kind, filename, title, color) for each demographic breakdown written by 04_bounce_back.py
+DEMOGRAPHIC_PLOTS = [
+    ("age", "ed_bounceback_by_age.csv", "ED Revisit by Age Group", '#e74c3c'),
+    ("age", "readmit_by_age.csv", "Bounce Back Admission by Age Group", '#3498db'),
+    ("race", "ed_bounceback_by_race.csv", "ED Revisit by Race", '#e74c3c'),
+    ("race", "readmit_by_race.csv", "Bounce Back Admission by Race", '#3498db'),
+    ("sex", "ed_bounceback_by_sex.csv", "ED Revisit by Sex", '#e74c3c'),
+    ("sex", "readmit_by_sex.csv", "Bounce Back Admission by Sex", '#3498db'),
+]
+DEMOGRAPHIC_FIGSIZE = {"age": (10, 6), "race": (14, 8), "sex": (8, 6)}
+
+def plot_demographic(ax, df, kind, title, color):
+    """Draw one demographic bar chart (age, race or sex) onto `ax`"""
+    rate_pct = df['rate'].to_numpy() * 100.0
+    max_pct = rate_pct.max()
     
-    # Age groups
-    age_files = [
-        ("ed_bounceback_by_age.csv", "ED Revisit by Age Group", '#e74c3c'),
-        ("readmit_by_age.csv", "Bounce Back Admission by Age Group", '#3498db')
-    ]
+    if kind == "race":
+        # Create bars using range positions
+        x_positions = range(len(df))
+        bars = ax.bar(x_positions, rate_pct, color=color, alpha=0.7)
+        
+        ax.set_title(title, fontweight='bold', fontsize=14)
+        ax.set_ylabel('Rate (%)', fontsize=12)
+        ax.set_xlabel('Race', fontsize=12)
+        
+        # Set x-ticks and labels
+        ax.set_xticks(x_positions)
+        
+        # Create shorter labels for better readability (very long names only);
+        # renaming the categories touches each distinct race once
+        short_labels = list(pd.CategoricalIndex(df.index).rename_categories(
+            lambda race: RACE_SHORT_DETAIL.get(race, race[:15] + "..." if len(race) > 20 else race)
+        ))
+        
+        ax.set_xticklabels(short_labels, rotation=45, ha='right', fontsize=10)
+        
+        # Add value labels on bars
+        ax.bar_label(bars, labels=[f'{rate:.1f}%' for rate in rate_pct], padding=3,
+                     fontsize=10, fontweight='bold')
+        
+        # Add sample size at bottom (below the axis, so not a bar label)
+        n_arr = df['n'].to_numpy()
+        d_arr = df['d'].to_numpy()
+        for i, bar in enumerate(bars):
+            ax.text(bar.get_x() + bar.get_width()/2., -max_pct*0.08,
+                   f'n={int(n_arr[i])}/{int(d_arr[i])}', ha='center', va='top', 
+                   fontsize=8, alpha=0.7)
+        
+        # Adjust layout to prevent label cutoff
+        plt.subplots_adjust(bottom=0.25)
+        return
     
-    for filename, title, color in age_files:
-        filepath = CSV_DIR / filename
-        if filepath.exists():
-            df = pd.read_csv(filepath, index_col=0)
-            
-            fig, ax = plt.subplots(figsize=(10, 6))
-            bars = ax.bar(df.index, df['rate']*100, color=color, alpha=0.7)
-            ax.set_title(title, fontweight='bold')
-            ax.set_ylabel('Rate (%)')
-            ax.set_xlabel('Age Group')
-            
-            # Add value labels
-            for bar, rate in zip(bars, df['rate']*100):
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                       f'{rate:.1f}%', ha='center', va='bottom')
-            
-            # Add sample size annotations
-            for i, (idx, row) in enumerate(df.iterrows()):
-                ax.text(i, -max(df['rate']*100)*0.05, f'n={int(row["d"])}', 
-                       ha='center', va='top', fontsize=8, alpha=0.7)
-            
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            plt.savefig(OUT / filename.replace('.csv', '_plot.png'), dpi=300, bbox_inches='tight')
-            plt.close()
+    bars = ax.bar(df.index, rate_pct, color=color, alpha=0.7)
+    ax.set_title(title, fontweight='bold')
+    ax.set_ylabel('Rate (%)')
+    ax.set_xlabel('Age Group' if kind == "age" else 'Sex')
     
-    # Race/ethnicity
-    race_files = [
-        ("ed_bounceback_by_race.csv", "ED Revisit by Race", '#e74c3c'),
-        ("readmit_by_race.csv", "Bounce Back Admission by Race", '#3498db')
-    ]
+    # Add value labels
+    ax.bar_label(bars, labels=[f'{rate:.1f}%' for rate in rate_pct], padding=3)
     
-    for filename, title, color in race_files:
-        filepath = CSV_DIR / filename
-        if filepath.exists():
-            df = pd.read_csv(filepath, index_col=0)
-            
-            # Create figure with extra space for labels
-            fig, ax = plt.subplots(figsize=(14, 8))
-            
-            # Create bars using range positions
-            x_positions = range(len(df))
-            bars = ax.bar(x_positions, df['rate']*100, color=color, alpha=0.7)
-            
-            ax.set_title(title, fontweight='bold', fontsize=14)
-            ax.set_ylabel('Rate (%)', fontsize=12)
-            ax.set_xlabel('Race', fontsize=12)
-            
-            # Set x-ticks and labels
-            ax.set_xticks(x_positions)
-            
-            # Create shorter labels for better readability
-            short_labels = []
-            for race in df.index:
-                if len(race) > 20:  # Shorten very long names
-                    if "American Indian" in race:
-                        short_labels.append("American Indian/\nAlaska Native")
-                    elif "Native Hawaiian" in race:
-                        short_labels.append("Native Hawaiian/\nPacific Islander")
-                    elif "Black or African American" in race:
-                        short_labels.append("Black or\nAfrican American")
-                    elif "Hispanic or Latino" in race:
-                        short_labels.append("Hispanic\nor Latino")
-                    else:
-                        short_labels.append(race[:15] + "...")
-                else:
-                    short_labels.append(race)
-            
-            ax.set_xticklabels(short_labels, rotation=45, ha='right', fontsize=10)
-            
-            # Add value labels on bars
-            for i, (bar, rate) in enumerate(zip(bars, df['rate']*100)):
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height + 0.05,
-                       f'{rate:.1f}%', ha='center', va='bottom', fontsize=10, fontweight='bold')
-                
-                # Add sample size at bottom
-                n_cases = int(df.iloc[i]['n'])
-                n_total = int(df.iloc[i]['d'])
-                ax.text(bar.get_x() + bar.get_width()/2., -max(df['rate']*100)*0.08,
-                       f'n={n_cases}/{n_total}', ha='center', va='top', 
-                       fontsize=8, alpha=0.7)
-            
-            # Adjust layout to prevent label cutoff
-            plt.subplots_adjust(bottom=0.25)
-            plt.tight_layout()
-            plt.savefig(OUT / filename.replace('.csv', '_plot.png'), dpi=300, bbox_inches='tight')
-            plt.close()
-    
-    # Sex
-    sex_files = [
-        ("ed_bounceback_by_sex.csv", "ED Revisit by Sex", '#e74c3c'),
-        ("readmit_by_sex.csv", "Bounce Back Admission by Sex", '#3498db')
-    ]
+    if kind == "age":
+        # Add sample size annotations
+        d_arr = df['d'].to_numpy()
+        for i in range(len(df)):
+            ax.text(i, -max_pct*0.05, f'n={int(d_arr[i])}', 
+                   ha='center', va='top', fontsize=8, alpha=0.7)
+        plt.xticks(rotation=45)
+
+def plot_demographic_comparisons():
+    """Plot demographic breakdowns for revisit and bounce back rates; returns False if all were up to date"""
+    rendered = False
+    figures = {}  # one figure per size, cleared and reused across the ed/readmit pair
     
-    for filename, title, color in sex_files:
+    for kind, filename, title, color in DEMOGRAPHIC_PLOTS:
         filepath = CSV_DIR / filename
-        if filepath.exists():
-            df = pd.read_csv(filepath, index_col=0)
-            
-            fig, ax = plt.subplots(figsize=(8, 6))
-            bars = ax.bar(df.index, df['rate']*100, color=color, alpha=0.7)
-            ax.set_title(title, fontweight='bold')
-            ax.set_ylabel('Rate (%)')
-            ax.set_xlabel('Sex')
-            
-            # Add value labels
-            for bar, rate in zip(bars, df['rate']*100):
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                       f'{rate:.1f}%', ha='center', va='bottom')
+        out = OUT / filename.replace('.csv', '_plot.png')
+        if filename in AVAILABLE_CSVS and not is_up_to_date(out, filepath, SCRIPT):
+            df = load_summary(filepath, index_col=0)
             
+            fig, ax = reuse_axes(figures, DEMOGRAPHIC_FIGSIZE[kind])
+            plot_demographic(ax, df, kind, title, color)
             plt.tight_layout()
-            plt.savefig(OUT / filename.replace('.csv', '_plot.png'), dpi=300, bbox_inches='tight')
-            plt.close()
+            save_figure(fig, out)
+            record_fingerprint(out, filepath, SCRIPT)
+            rendered = True
 
-def plot_diagnosis_analysis():
-    """Plot diagnosis-based analysis with meaningful sample sizes and descriptions"""
-    diag_files = [
-        ("ed_bounceback_by_diagnosis.csv", "ED Revisit by Diagnosis", '#e74c3c'),
-        ("readmit_by_diagnosis.csv", "Bounce Back Admission by Diagnosis", '#3498db')
-    ]
-    
-    # Try to load diagnosis descriptions
-    diagnosis_map = {}
+    for fig, _ in figures.values():
+        plt.close(fig)
+    return rendered
+
+@lru_cache(maxsize=1)
+def load_diagnosis_map():
+    """Map ICD code -> title (first occurrence of each code), loaded once per run"""
     try:
-        diag_df = pd.read_csv("data/diagnosis.csv")
-        # Create mapping from code to title, taking first occurrence of each code
-        diagnosis_map = diag_df.drop_duplicates('icd_code').set_index('icd_code')['icd_title'].to_dict()
+        diag_df = pd.read_csv("data/diagnosis.csv", engine="pyarrow", usecols=['icd_code', 'icd_title'],
+                              dtype={'icd_code': str, 'icd_title': str})
+        diagnosis_map = diag_df.drop_duplicates('icd_code', keep='first').set_index('icd_code')['icd_title'].to_dict()
         print(f"Loaded {len(diagnosis_map)} diagnosis descriptions")
-    except:
+        return diagnosis_map
+    except Exception:
         print("Could not load diagnosis descriptions, using codes only")
-    
-    for filename, title, color in diag_files:
+        return {}
+
+# (filename, title, color) for each diagnosis breakdown written by 04_bounce_back.py
+DIAGNOSIS_PLOTS = (
+    ("ed_bounceback_by_diagnosis.csv", "ED Revisit by Diagnosis", '#e74c3c'),
+    ("readmit_by_diagnosis.csv", "Bounce Back Admission by Diagnosis", '#3498db'),
+)
+
+def plot_diagnosis_analysis():
+    """Plot diagnosis-based analysis with meaningful sample sizes and descriptions.
+
+    Returns False if every diagnosis plot was already up to date.
+    """
+    rendered = False
+    for filename, title, color in DIAGNOSIS_PLOTS:
         filepath = CSV_DIR / filename
-        if filepath.exists():
-            df = pd.read_csv(filepath, index_col=0)
+        out = OUT / filename.replace('.csv', '_plot.png')
+        inputs = (filepath, Path("data/diagnosis.csv"), SCRIPT)
+        if filename in AVAILABLE_CSVS and not is_up_to_date(out, *inputs):
+            df = load_summary(filepath, index_col=0)
             
             # Filter for meaningful sample sizes (at least 10 total cases and at least 2 events)
-            df_filtered = df[(df['d'] >= 10) & (df['n'] >= 2)].copy()
+            df_filtered = filter_meaningful(df).copy()
             
             if len(df_filtered) == 0:
                 print(f"No diagnoses with adequate sample size for {filename}")
                 continue
             
             # Add diagnosis descriptions if available
+            diagnosis_map = load_diagnosis_map()
             if diagnosis_map:
-                df_filtered['description'] = df_filtered.index.map(diagnosis_map)
+                df_filtered['description'] = df_filtered.index.astype(str).map(diagnosis_map)
                 # Use description if available, otherwise use code
-                df_filtered['display_name'] = df_filtered.apply(
-                    lambda row: row['description'] if pd.notna(row['description']) else row.name, axis=1
-                )
+                display_name = df_filtered['description'].where(
+                    df_filtered['description'].notna(), df_filtered.index.to_series()
+                ).astype(str)
                 # Truncate long descriptions
-                df_filtered['display_name'] = df_filtered['display_name'].apply(
-                    lambda x: x[:50] + "..." if len(str(x)) > 50 else str(x)
+                df_filtered['display_name'] = display_name.where(
+                    display_name.str.len() <= 50, display_name.str[:50] + "..."
                 )
             else:
                 df_filtered['display_name'] = df_filtered.index.astype(str)
             
-            # Sort by rate (descending) and take top 15 for readability
-            df_sorted = df_filtered.sort_values('rate', ascending=False).head(15)
+            # Take the top 15 by rate (descending) for readability: partition to find the
+            # 15th-highest rate, then sort only the rows above it (ties keep file order)
+            rates = df_filtered['rate'].to_numpy()
+            k = min(15, len(rates))
+            kth = -np.partition(-rates, k-1)[k-1]
+            above = np.flatnonzero(rates > kth)
+            top_idx = np.concatenate([above, np.flatnonzero(rates == kth)[:k - len(above)]])
+            top_idx = top_idx[np.argsort(-rates[top_idx], kind='stable')]
+            df_sorted = df_filtered.iloc[top_idx]
+            rate_pct = df_sorted['rate'].to_numpy() * 100.0
             
             fig, ax = plt.subplots(figsize=(16, 10))
-            bars = ax.barh(range(len(df_sorted)), df_sorted['rate']*100, color=color, alpha=0.7)
+            bars = ax.barh(range(len(df_sorted)), rate_pct, color=color, alpha=0.7, rasterized=True)
             ax.set_title(f'{title} (Top 15, min 10 cases, min 2 events)', fontweight='bold', fontsize=14)
             ax.set_xlabel('Rate (%)', fontsize=12)
             ax.set_ylabel('Diagnosis', fontsize=12)
@@ -344,13 +415,11 @@ def plot_diagnosis_analysis():
             ax.set_yticklabels(df_sorted['display_name'], fontsize=10)
             
             # Add value labels with sample sizes
-            for i, (idx, row) in enumerate(df_sorted.iterrows()):
-                rate = row['rate'] * 100
-                n_events = int(row['n'])
-                n_total = int(row['d'])
-                
-                ax.text(rate + 1, i, f'{rate:.1f}% ({n_events}/{n_total})', 
-                       ha='left', va='center', fontsize=9, fontweight='bold')
+            n_arr = df_sorted['n'].to_numpy()
+            d_arr = df_sorted['d'].to_numpy()
+            ax.bar_label(bars, labels=[f'{rate:.1f}% ({int(n)}/{int(d)})'
+                                       for rate, n, d in zip(rate_pct, n_arr, d_arr)],
+                         padding=3, fontsize=9, fontweight='bold')
             
             # Add summary text
             total_diagnoses = len(df)
@@ -360,16 +429,50 @@ def plot_diagnosis_analysis():
                    bbox=dict(boxstyle='round,pad=0.3', facecolor='white', alpha=0.8))
             
             plt.tight_layout()
-            plt.savefig(OUT / filename.replace('.csv', '_plot.png'), dpi=300, bbox_inches='tight')
-            plt.close()
+            save_figure(fig, out)
+            record_fingerprint(out, *inputs)
+            plt.close(fig)
+            rendered = True
+    return rendered
+
+def _race_ticks(ax, index):
+    """Every race, with very short labels"""
+    ax.set_xticks(range(len(index)))
+    ax.set_xticklabels([RACE_SHORT_DASH.get(race, race[:6]) for race in index],
+                       fontsize=7, rotation=45, ha='right')
+
+def _all_ticks(ax, index):
+    """Every category label (few categories, e.g. sex)"""
+    ax.set_xticks(range(len(index)))
+    ax.set_xticklabels(index, fontsize=7, rotation=45)
+
+def _end_ticks(ax, index):
+    """Only the first and last category labels (many ordered categories, e.g. age)"""
+    ax.set_xticks([0, len(index)-1])
+    ax.set_xticklabels([index[0], index[-1]], fontsize=7)
+
+# (filename, title, tick labeler, color, gridspec position) for each dashboard mini-chart
+DASHBOARD_PLOTS = [
+    ("ed_bounceback_by_age.csv", "ED Revisit by Age", _end_ticks, '#e74c3c', (1, 0)),
+    ("readmit_by_age.csv", "Bounce Back Admission by Age", _end_ticks, '#3498db', (1, 1)),
+    ("ed_bounceback_by_race.csv", "ED Revisit by Race", _race_ticks, '#e74c3c', (1, 2)),
+    ("readmit_by_race.csv", "Bounce Back Admission by Race", _race_ticks, '#3498db', (1, 3)),
+    ("ed_bounceback_by_sex.csv", "ED Revisit by Sex", _all_ticks, '#e74c3c', (2, 0)),
+    ("readmit_by_sex.csv", "Bounce Back Admission by Sex", _all_ticks, '#3498db', (2, 1)),
+]
 
 def create_summary_dashboard():
-    """Create a summary dashboard with key metrics"""
+    """Create a summary dashboard with key metrics; returns False if it was already up to date"""
+    inputs = [p for p in [CSV_DIR / "overlap_standard.csv"] + [CSV_DIR / f for f, *_ in DASHBOARD_PLOTS]
+              if p.name in AVAILABLE_CSVS] + [SCRIPT]
+    if is_up_to_date(OUT / "bounce_back_dashboard.png", *inputs):
+        return False
+    
     # Try to load the overlap data for overall rates
     overall_rates = {}
     
-    if (CSV_DIR / "overlap_standard.csv").exists():
-        df_overlap = pd.read_csv(CSV_DIR / "overlap_standard.csv")
+    if "overlap_standard.csv" in AVAILABLE_CSVS:
+        df_overlap = load_summary(CSV_DIR / "overlap_standard.csv")
         total_visits = df_overlap['count'].sum()
         
         ed_revisit_rate = (df_overlap[df_overlap['category'].isin(['both', 'ed_only'])]['count'].sum() / total_visits) * 100
@@ -406,88 +509,52 @@ def create_summary_dashboard():
                        bbox=dict(boxstyle='round,pad=0.5', facecolor='lightblue', alpha=0.3))
     
     # Load and plot mini-charts for demographic breakdowns
-    plot_positions = [(1, 0), (1, 1), (1, 2), (1, 3), (2, 0), (2, 1), (2, 2), (2, 3)]
+    for filename, title, set_ticks, color, (row, col) in DASHBOARD_PLOTS:
+        if filename not in AVAILABLE_CSVS:
+            continue
+        # Already parsed (and cached) if the demographic plots were drawn in this process
+        df = load_summary(CSV_DIR / filename, index_col=0)
+        rate_pct = df['rate'].to_numpy() * 100.0
+        ax = fig.add_subplot(gs[row, col])
+        
+        ax.bar(range(len(df)), rate_pct, color=color, alpha=0.7, rasterized=True)
+        ax.set_title(title, fontsize=10, fontweight='bold')
+        ax.set_ylabel('Rate (%)', fontsize=8)
+        set_ticks(ax, df.index)
+        
+        # Add max value label
+        max_idx = df['rate'].idxmax()
+        max_val = np.nanmax(rate_pct)
+        ax.text(0.5, 0.9, f'Max: {max_val:.1f}%\n({max_idx})', 
+               transform=ax.transAxes, ha='center', va='top', fontsize=7,
+               bbox=dict(boxstyle='round,pad=0.2', facecolor='white', alpha=0.8))
     
-    # Files to include in dashboard
-    dashboard_files = [
-        ("ed_bounceback_by_age.csv", "ED Revisit by Age"),
-        ("readmit_by_age.csv", "Bounce Back Admission by Age"),
-        ("ed_bounceback_by_race.csv", "ED Revisit by Race"),
-        ("readmit_by_race.csv", "Bounce Back Admission by Race"),
-        ("ed_bounceback_by_sex.csv", "ED Revisit by Sex"),
-        ("readmit_by_sex.csv", "Bounce Back Admission by Sex"),
-    ]
-    
-    for i, (filename, title) in enumerate(dashboard_files[:6]):
-        if i < len(plot_positions):
-            row, col = plot_positions[i]
-            filepath = CSV_DIR / filename
-            
-            if filepath.exists():
-                df = pd.read_csv(filepath, index_col=0)
-                ax = fig.add_subplot(gs[row, col])
-                
-                colors = ['#e74c3c' if 'ed_bounceback' in filename else '#3498db']
-                bars = ax.bar(range(len(df)), df['rate']*100, color=colors[0], alpha=0.7)
-                ax.set_title(title, fontsize=10, fontweight='bold')
-                ax.set_ylabel('Rate (%)', fontsize=8)
-                
-                # Better x-labels handling for race data in dashboard
-                if 'race' in filename:
-                    ax.set_xticks(range(len(df)))
-                    # Create very short labels for race categories
-                    short_labels = []
-                    for race in df.index:
-                        if "American Indian" in race:
-                            short_labels.append("AI/AN")
-                        elif "Native Hawaiian" in race:
-                            short_labels.append("NH/PI")  
-                        elif "Black or African American" in race:
-                            short_labels.append("Black")
-                        elif "Hispanic or Latino" in race:
-                            short_labels.append("Hispanic")
-                        elif race == "White":
-                            short_labels.append("White")
-                        elif race == "Asian":
-                            short_labels.append("Asian")
-                        elif race == "Other":
-                            short_labels.append("Other")
-                        elif race == "Unknown":
-                            short_labels.append("Unknown")
-                        else:
-                            short_labels.append(race[:6])
-                    ax.set_xticklabels(short_labels, fontsize=7, rotation=45, ha='right')
-                elif len(df) <= 3:
-                    ax.set_xticks(range(len(df)))
-                    ax.set_xticklabels(df.index, fontsize=7, rotation=45)
-                else:
-                    ax.set_xticks([0, len(df)-1])
-                    ax.set_xticklabels([df.index[0], df.index[-1]], fontsize=7)
-                
-                # Add max value label
-                max_idx = df['rate'].idxmax()
-                max_val = df['rate'].max() * 100
-                ax.text(0.5, 0.9, f'Max: {max_val:.1f}%\n({max_idx})', 
-                       transform=ax.transAxes, ha='center', va='top', fontsize=7,
-                       bbox=dict(boxstyle='round,pad=0.2', facecolor='white', alpha=0.8))
-    
-    plt.savefig(OUT / "bounce_back_dashboard.png", dpi=300, bbox_inches='tight')
-    plt.close()
+    save_figure(fig, OUT / "bounce_back_dashboard.png")
+    record_fingerprint(OUT / "bounce_back_dashboard.png", *inputs)
+    plt.close(fig)
+    return True
 
 def plot_seasonal_heatmap():
-    """Create seasonal heatmap of bounce-back rates"""
+    """Create seasonal heatmap of bounce-back rates; returns False if it was already up to date"""
     ed_monthly = CSV_DIR / "ed_bounceback_monthly.csv"
     
-    if ed_monthly.exists():
-        df = pd.read_csv(ed_monthly)
-        
-        # Extract year and month
-        df['year'] = df['month'].str[:4].astype(int)
-        df['month_num'] = df['month'].str[5:7].astype(int)
-        
-        # Create pivot table for heatmap
-        pivot_data = df.pivot(index='year', columns='month_num', values='rate')
-        pivot_data_pct = pivot_data * 100
+    if ed_monthly.name in AVAILABLE_CSVS and not is_up_to_date(OUT / "seasonal_heatmap.png", ed_monthly, SCRIPT):
+        df = load_summary(ed_monthly, usecols=MONTHLY_COLS).copy()
+        
+        # Extract year and month from a single explicit-format parse
+        month_date = pd.to_datetime(df['month'], format='%Y-%m', cache=True)
+        df['year'] = month_date.dt.year
+        df['month_num'] = month_date.dt.month
+        
+        # Scatter rates straight into a dense (year x month) grid for the heatmap;
+        # only months that occur in the data get a column, as with a pivot
+        years = np.unique(df['year'].to_numpy())
+        months = np.unique(df['month_num'].to_numpy())
+        grid = np.full((len(years), len(months)), np.nan)
+        grid[np.searchsorted(years, df['year'].to_numpy()),
+             np.searchsorted(months, df['month_num'].to_numpy())] = df['rate'].to_numpy() * 100
+        pivot_data_pct = pd.DataFrame(grid, index=pd.Index(years, name='year'),
+                                      columns=pd.Index(months, name='month_num'))
         
         # Only show recent years for better visualization
         if len(pivot_data_pct) > 10:
@@ -495,53 +562,79 @@ def plot_seasonal_heatmap():
         
         fig, ax = plt.subplots(figsize=(14, 8))
         
-        # Create heatmap using seaborn for better handling
-        sns.heatmap(pivot_data_pct, annot=True, fmt='.1f', cmap='YlOrRd', 
-                   cbar_kws={'label': 'ED Revisit Rate (%)'}, ax=ax)
-        
-        # Set labels - let seaborn handle the ticks automatically
+        # Draw the grid as a single image (NaN cells stay blank) instead of sns.heatmap
+        data = pivot_data_pct.to_numpy()
+        im = ax.imshow(data, cmap='YlOrRd', aspect='auto', interpolation='nearest', rasterized=True)
+        cbar = fig.colorbar(im, ax=ax, label='ED Revisit Rate (%)')
+        cbar.outline.set_visible(False)
+        for spine in ax.spines.values():
+            spine.set_visible(False)
+        
+        # Annotate finite cells; dark cells get white text (same luminance rule as seaborn)
+        rgb = im.cmap(im.norm(data))[..., :3]
+        rgb = np.where(rgb <= 0.03928, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+        dark = rgb @ np.array([0.2126, 0.7152, 0.0722]) <= 0.408
+        for r, c in zip(*np.nonzero(np.isfinite(data))):
+            ax.text(c, r, f'{data[r, c]:.1f}', ha='center', va='center',
+                    color='w' if dark[r, c] else '0.15')
+        
+        ax.set_xticks(range(data.shape[1]))
+        ax.set_yticks(range(data.shape[0]))
+        ax.set_yticklabels(pivot_data_pct.index)
+        
+        # Set labels
         ax.set_title('Seasonal Pattern of ED Revisit Rates', fontweight='bold', fontsize=14)
         ax.set_xlabel('Month')
         ax.set_ylabel('Year')
         
-        # Manually set month labels
-        month_labels = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-                       'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        
-        # Only set labels for columns that exist
-        existing_months = [month_labels[int(col)-1] for col in pivot_data_pct.columns if not pd.isna(col)]
+        # Only set month labels for columns that exist
+        cols = pivot_data_pct.columns.to_numpy()
+        month_idx = cols[~pd.isna(cols)].astype(np.int64) - 1
+        existing_months = np.asarray(MONTH_LABELS)[month_idx].tolist()
         ax.set_xticklabels(existing_months, rotation=0)
         
         plt.tight_layout()
-        plt.savefig(OUT / "seasonal_heatmap.png", dpi=300, bbox_inches='tight')
-        plt.close()
+        save_figure(fig, OUT / "seasonal_heatmap.png")
+        record_fingerprint(OUT / "seasonal_heatmap.png", ed_monthly, SCRIPT)
+        plt.close(fig)
+        return True
+    return False
+
+def main(parallel=False):
+    """Main function to generate all visualizations.
 
-def main():
-    """Main function to generate all visualizations"""
+    With parallel=True the independent plot functions run in worker processes;
+    this needs the module to be importable by the workers, so it is only used
+    when the script is run directly.
+    """
     print("Generating bounce-back analysis visualizations...")
     
     # Create output directory if it doesn't exist
     OUT.mkdir(exist_ok=True)
     
+    # Independent plots: each reads its own CSVs and writes its own PNGs
+    tasks = [
+        (load_and_plot_overlap, "Overlap visualizations"),
+        (plot_time_trends, "Time trend plots"),
+        (plot_demographic_comparisons, "Demographic comparison plots"),
+        (plot_diagnosis_analysis, "Diagnosis analysis plots"),
+        (plot_seasonal_heatmap, "Seasonal heatmap"),
+    ]
+    
     try:
         # Generate all plots based
-        load_and_plot_overlap()
-        print("✓ Overlap visualizations created")
-        
-        plot_time_trends()
-        print("✓ Time trend plots created")
-        
-        plot_demographic_comparisons()
-        print("✓ Demographic comparison plots created")
-        
-        plot_diagnosis_analysis()
-        print("✓ Diagnosis analysis plots created")
-        
-        plot_seasonal_heatmap()
-        print("✓ Seasonal heatmap created")
-        
-        create_summary_dashboard()
-        print("✓ Summary dashboard created")
+        if parallel:
+            with ProcessPoolExecutor(max_workers=min(len(tasks) + 1, os.cpu_count() or 1)) as ex:
+                futures = [ex.submit(func) for func, _ in tasks]
+                dashboard = ex.submit(create_summary_dashboard)
+                for future, (_, name) in zip(futures, tasks):
+                    print(figure_status(name, future.result()))
+                dashboard_rendered = dashboard.result()
+        else:
+            for func, name in tasks:
+                print(figure_status(name, func()))
+            dashboard_rendered = create_summary_dashboard()
+        print(figure_status("Summary dashboard", dashboard_rendered))
         
         print(f"\nAll visualizations saved to: {OUT.absolute()}")
         
@@ -559,4 +652,4 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main()
+    main(parallel=True)
@@ -1,66 +1,107 @@
 # src/07_generate_report.py
 
+import os
+from functools import lru_cache
 from pathlib import Path
 import pandas as pd
+from _io_cache import filter_meaningful, load_summaries
 
-def generate_report():
-    """Generate a text report summarizing the bounce-back analysis results"""
+@lru_cache(maxsize=1)
+def _load_diag_map():
+    """Map ICD code -> title (first occurrence of each code), loaded once per run"""
+    try:
+        diag_df = pd.read_csv("data/diagnosis.csv", usecols=['icd_code', 'icd_title'],
+                              dtype={'icd_code': str, 'icd_title': str})
+        return diag_df.drop_duplicates('icd_code').set_index('icd_code')['icd_title'].to_dict()
+    except Exception:
+        return {}
+
+def _dir_names(directory):
+    """Names of the entries in `directory` from a single scandir (empty if it is missing)"""
+    try:
+        with os.scandir(directory) as entries:
+            return {e.name for e in entries}
+    except FileNotFoundError:
+        return set()
+
+def _count_ext(names, ext):
+    """Count names ending in `ext`, skipping hidden files as glob('*' + ext) does"""
+    return sum(1 for name in names if name.endswith(ext) and not name.startswith('.'))
+
+def _rate_stats(df):
+    """Mean, max and min monthly rate (in %)"""
+    return df['rate'].agg(['mean', 'max', 'min']).to_numpy() * 100
+
+# Summary tables used by the report: file name -> index_col
+REPORT_SUMMARIES = {
+    "overlap_standard.csv": None,
+    "ed_bounceback_monthly.csv": None,
+    "readmit_monthly.csv": None,
+    "ed_bounceback_by_race.csv": 0,
+    "readmit_by_race.csv": 0,
+    "ed_bounceback_by_diagnosis.csv": 0,
+    "readmit_by_diagnosis.csv": 0,
+}
+
+def generate_report(summaries=None):
+    """Generate a text report summarizing the bounce-back analysis results.
+
+    `summaries` maps file name -> frame for tables already loaded by the caller;
+    by default every table in REPORT_SUMMARIES found in csv_outputs/ is loaded.
+    Sections whose table is missing are skipped.
+    """
     
     FIGURES = Path("figures")
     CSV_DIR = Path("csv_outputs")
+    if summaries is None:
+        summaries = load_summaries(CSV_DIR, REPORT_SUMMARIES)
     
     print("=" * 80)
     print("ED REVISIT AND BOUNCE BACK ADMISSION ANALYSIS REPORT")
     print("=" * 80)
     
     # Read overlap data for main results
-    if (CSV_DIR / "overlap_standard.csv").exists():
-        df_overlap = pd.read_csv(CSV_DIR / "overlap_standard.csv")
+    df_overlap = summaries.get("overlap_standard.csv")
+    if df_overlap is not None:
         total = df_overlap['count'].sum()
+        counts = df_overlap.set_index('category')['count'].to_dict()
+        rates = df_overlap.set_index('category')['rate'].to_dict()
         
         print(f"\nOVERALL RESULTS (n={total:,} ED discharges)")
         print("-" * 50)
         
-        for _, row in df_overlap.iterrows():
-            category = row['category'].replace('_', ' ').title()
-            count = int(row['count'])
-            rate = row['rate'] * 100
-            print(f"{category:20s}: {count:6,} ({rate:5.1f}%)")
+        categories = df_overlap['category'].str.replace('_', ' ').str.title()
+        counts_i = df_overlap['count'].astype(int)
+        rates_pct = df_overlap['rate'] * 100
+        print("\n".join(f"{category:20s}: {count:6,} ({rate:5.1f}%)"
+                        for category, count, rate in zip(categories, counts_i, rates_pct)))
         
         # Calculate derived metrics
-        ed_revisit = df_overlap[df_overlap['category'].isin(['both', 'ed_only'])]['count'].sum()
-        readmit = df_overlap[df_overlap['category'].isin(['both', 'admit_only'])]['count'].sum()
+        ed_revisit = counts['both'] + counts['ed_only']
+        readmit = counts['both'] + counts['admit_only']
         
         print(f"\nKEY METRICS")
         print("-" * 50)
         print(f"Total ED Revisit Rate       : {ed_revisit/total*100:5.1f}%")
         print(f"Total Hospital Readmit Rate : {readmit/total*100:5.1f}%")
-        print(f"Overlap Rate                : {df_overlap[df_overlap['category']=='both']['rate'].iloc[0]*100:5.1f}%")
+        print(f"Overlap Rate                : {rates['both']*100:5.1f}%")
     
     # Monthly trends summary
-    if (CSV_DIR / "ed_bounceback_monthly.csv").exists():
-        df_monthly = pd.read_csv(CSV_DIR / "ed_bounceback_monthly.csv")
-        avg_rate = df_monthly['rate'].mean() * 100
-        max_rate = df_monthly['rate'].max() * 100
-        min_rate = df_monthly['rate'].min() * 100
-        
-        print(f"\nMONTHLY TRENDS - ED REVISIT")
-        print("-" * 50)
-        print(f"Average Monthly Rate : {avg_rate:5.1f}%")
-        print(f"Highest Monthly Rate : {max_rate:5.1f}%")
-        print(f"Lowest Monthly Rate  : {min_rate:5.1f}%")
+    monthly_files = [
+        ("ed_bounceback_monthly.csv", "ED REVISIT"),
+        ("readmit_monthly.csv", "BOUNCE BACK"),
+    ]
     
-    if (CSV_DIR / "readmit_monthly.csv").exists():
-        df_monthly = pd.read_csv(CSV_DIR / "readmit_monthly.csv")
-        avg_rate = df_monthly['rate'].mean() * 100
-        max_rate = df_monthly['rate'].max() * 100
-        min_rate = df_monthly['rate'].min() * 100
-        
-        print(f"\nMONTHLY TRENDS - BOUNCE BACK")
-        print("-" * 50)
-        print(f"Average Monthly Rate : {avg_rate:5.1f}%")
-        print(f"Highest Monthly Rate : {max_rate:5.1f}%")
-        print(f"Lowest Monthly Rate  : {min_rate:5.1f}%")
+    for filename, title in monthly_files:
+        df_monthly = summaries.get(filename)
+        if df_monthly is not None:
+            avg_rate, max_rate, min_rate = _rate_stats(df_monthly)
+            
+            print(f"\nMONTHLY TRENDS - {title}")
+            print("-" * 50)
+            print(f"Average Monthly Rate : {avg_rate:5.1f}%")
+            print(f"Highest Monthly Rate : {max_rate:5.1f}%")
+            print(f"Lowest Monthly Rate  : {min_rate:5.1f}%")
     
     # Demographic breakdown highlights
     demo_files = [
@@ -69,9 +110,8 @@ def generate_report():
     ]
     
     for filename, title in demo_files:
-        filepath = CSV_DIR / filename
-        if filepath.exists():
-            df = pd.read_csv(filepath, index_col=0)
+        df = summaries.get(filename)
+        if df is not None:
             max_group = df['rate'].idxmax()
             max_rate = df['rate'].max() * 100
             min_group = df['rate'].idxmin()
@@ -83,60 +123,51 @@ def generate_report():
             print(f"Lowest:  {min_group:15s} {min_rate:5.1f}%")
     
     # Top diagnosis breakdown with meaningful sample sizes
-    if (CSV_DIR / "ed_bounceback_by_diagnosis.csv").exists():
-        df = pd.read_csv(CSV_DIR / "ed_bounceback_by_diagnosis.csv", index_col=0)
+    df = summaries.get("ed_bounceback_by_diagnosis.csv")
+    if df is not None:
         # Filter for meaningful sample sizes (same as visualization)
-        df_filtered = df[(df['d'] >= 10) & (df['n'] >= 2)]
+        df_filtered = filter_meaningful(df)
         
         if len(df_filtered) > 0:
-            top_5 = df_filtered.sort_values('rate', ascending=False).head(5)
-            
-            # Try to load diagnosis descriptions
-            try:
-                diag_df = pd.read_csv("data/diagnosis.csv")
-                diag_map = diag_df.drop_duplicates('icd_code').set_index('icd_code')['icd_title'].to_dict()
-            except:
-                diag_map = {}
+            top_5 = df_filtered.nlargest(5, 'rate')
+            diag_map = _load_diag_map()
             
             print(f"\n🩺 TOP 5 DIAGNOSES - ED REVISIT (≥10 cases, ≥2 events)")
             print("-" * 50)
-            for i, (diag, row) in enumerate(top_5.iterrows(), 1):
-                desc = diag_map.get(diag, diag)[:40]  # Truncate long descriptions
-                print(f"{i}. {desc:40s} {row['rate']*100:5.1f}% (n={int(row['n'])}/{int(row['d'])})")
+            rows = zip(top_5.index.to_numpy(), top_5['rate'].to_numpy() * 100,
+                       top_5['n'].to_numpy(), top_5['d'].to_numpy())
+            # Truncate long descriptions
+            print("\n".join(f"{i}. {diag_map.get(diag, diag)[:40]:40s} {rate:5.1f}% (n={int(n)}/{int(d)})"
+                            for i, (diag, rate, n, d) in enumerate(rows, 1)))
         else:
             print(f"\n🩺 No diagnoses found with adequate sample size for ED REVISIT")
     
-    if (CSV_DIR / "readmit_by_diagnosis.csv").exists():
-        df = pd.read_csv(CSV_DIR / "readmit_by_diagnosis.csv", index_col=0)
+    df = summaries.get("readmit_by_diagnosis.csv")
+    if df is not None:
         # Filter for meaningful sample sizes (same as visualization)
-        df_filtered = df[(df['d'] >= 10) & (df['n'] >= 2)]
+        df_filtered = filter_meaningful(df)
         
         if len(df_filtered) > 0:
-            top_5 = df_filtered.sort_values('rate', ascending=False).head(5)
-            
-            # Try to load diagnosis descriptions
-            try:
-                diag_df = pd.read_csv("data/diagnosis.csv")
-                diag_map = diag_df.drop_duplicates('icd_code').set_index('icd_code')['icd_title'].to_dict()
-            except:
-                diag_map = {}
+            top_5 = df_filtered.nlargest(5, 'rate')
+            diag_map = _load_diag_map()
             
             print(f"\n🩺 TOP 5 DIAGNOSES - Bounce back (≥10 cases, ≥2 events)")
             print("-" * 50)
-            for i, (diag, row) in enumerate(top_5.iterrows(), 1):
-                desc = diag_map.get(diag, diag)[:40]  # Truncate long descriptions  
-                print(f"{i}. {desc:40s} {row['rate']*100:5.1f}% (n={int(row['n'])}/{int(row['d'])})")
+            rows = zip(top_5.index.to_numpy(), top_5['rate'].to_numpy() * 100,
+                       top_5['n'].to_numpy(), top_5['d'].to_numpy())
+            # Truncate long descriptions
+            print("\n".join(f"{i}. {diag_map.get(diag, diag)[:40]:40s} {rate:5.1f}% (n={int(n)}/{int(d)})"
+                            for i, (diag, rate, n, d) in enumerate(rows, 1)))
         else:
             print(f"\n🩺 No diagnoses found with adequate sample size for readmissions")
     
-    # Generated files summary
-    plot_files = list(FIGURES.glob("*.png"))
-    csv_files = list(CSV_DIR.glob("*.csv"))
+    # Generated files summary (one directory read each)
+    figure_names = _dir_names(FIGURES)
     
     print(f"\nGENERATED FILES")
     print("-" * 50)
-    print(f"CSV Data Files: {len(csv_files)}")
-    print(f"Visualization Files: {len(plot_files)}")
+    print(f"CSV Data Files: {_count_ext(_dir_names(CSV_DIR), '.csv')}")
+    print(f"Visualization Files: {_count_ext(figure_names, '.png')}")
     
     print(f"\nKEY VISUALIZATIONS CREATED:")
     key_plots = [
@@ -148,7 +179,7 @@ def generate_report():
     ]
     
     for plot in key_plots:
-        if (FIGURES / plot).exists():
+        if plot in figure_names:
             print(f"  ✓ {plot}")
         else:
             print(f"  ✗ {plot} (not found)")
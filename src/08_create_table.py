@@ -4,6 +4,7 @@
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from _io_cache import filter_meaningful, load_summary
 
 CSV_DIR = Path("csv_outputs")
 OUT = Path("figures")
@@ -17,13 +18,14 @@ def create_table_1():
         print("Missing overlap data file")
         return
     
-    df_overlap = pd.read_csv(overlap_file)
+    df_overlap = load_summary(overlap_file)
     total_visits = df_overlap['count'].sum()
+    counts = df_overlap.set_index('category')['count'].to_dict()
     
     # Calculate rates
-    ed_revisit_rate = (df_overlap[df_overlap['category'].isin(['both', 'ed_only'])]['count'].sum() / total_visits) * 100
-    readmit_rate = (df_overlap[df_overlap['category'].isin(['both', 'admit_only'])]['count'].sum() / total_visits) * 100
-    both_rate = (df_overlap[df_overlap['category'] == 'both']['count'].sum() / total_visits) * 100
+    ed_revisit_rate = ((counts['both'] + counts['ed_only']) / total_visits) * 100
+    readmit_rate = ((counts['both'] + counts['admit_only']) / total_visits) * 100
+    both_rate = (counts['both'] / total_visits) * 100
     
     # Load demographic breakdowns
     results = []
@@ -50,44 +52,57 @@ def create_table_1():
         readmit_path = CSV_DIR / readmit_file
         
         if ed_path.exists() and readmit_path.exists():
-            df_ed = pd.read_csv(ed_path, index_col=0)
-            df_readmit = pd.read_csv(readmit_path, index_col=0)
+            df_ed = load_summary(ed_path, index_col=0)
+            df_readmit = load_summary(readmit_path, index_col=0)
             
-            for idx in df_ed.index:
-                if idx in df_readmit.index:
-                    ed_rate = df_ed.loc[idx, 'rate'] * 100
-                    readmit_rate = df_readmit.loc[idx, 'rate'] * 100
-                    n_total = int(df_ed.loc[idx, 'd'])
-                    
-                    results.append({
-                        'Characteristic': category,
-                        'Category': str(idx),
-                        'N': f'{n_total:,}',
-                        'ED Revisit Rate (%)': f'{ed_rate:.1f}',
-                        'Bounce Back Admission Rate (%)': f'{readmit_rate:.1f}',
-                    })
+            # Groups present in both files, in the ED file's order
+            joined = df_ed[['rate', 'd']].rename(columns={'rate': 'ed'}).join(
+                df_readmit[['rate']].rename(columns={'rate': 're'}), how='inner')
+            
+            for idx, ed, d, re in joined.itertuples(name=None):
+                results.append({
+                    'Characteristic': category,
+                    'Category': str(idx),
+                    'N': f'{int(d):,}',
+                    'ED Revisit Rate (%)': f'{ed * 100:.1f}',
+                    'Bounce Back Admission Rate (%)': f'{re * 100:.1f}',
+                })
     
     # Create DataFrame and save
     table1_df = pd.DataFrame(results)
     table1_df.to_csv(OUT / "table1_patient_characteristics.csv", index=False)
     
     # Create formatted version for publication
-    with open(OUT / "table1_formatted.txt", 'w') as f:
-        f.write("Table 1. Patient Characteristics and Outcome Rates\n")
-        f.write("=" * 60 + "\n\n")
+    lines = ["Table 1. Patient Characteristics and Outcome Rates", "=" * 60, ""]
+    
+    current_char = ""
+    columns = ['Characteristic', 'Category', 'N', 'ED Revisit Rate (%)', 'Bounce Back Admission Rate (%)']
+    for char, cat, n, ed_rate, readmit_rate in table1_df[columns].itertuples(index=False, name=None):
+        if char != current_char:
+            if current_char != "":
+                lines.append("")
+            lines.append(char)
+            current_char = char
         
-        current_char = ""
-        for _, row in table1_df.iterrows():
-            if row['Characteristic'] != current_char:
-                if current_char != "":
-                    f.write("\n")
-                f.write(f"{row['Characteristic']}\n")
-                current_char = row['Characteristic']
-            
-            f.write(f"  {row['Category']:<25} {row['N']:>8} {row['ED Revisit Rate (%)']:>8} {row['Bounce Back Admission Rate (%)']:>8}\n")
+        lines.append(f"  {cat:<25} {n:>8} {ed_rate:>8} {readmit_rate:>8}")
+    
+    with open(OUT / "table1_formatted.txt", 'w') as f:
+        f.write("\n".join(lines) + "\n")
     
     print("✓ Table 1 created: Patient characteristics and outcomes")
 
+def _diagnosis_rows(outcome, top, diagnosis_map):
+    """Table 2 rows for one outcome: description (truncated to 50 chars), events, total, rate"""
+    if top.empty:
+        return []
+    codes = top.index.to_series()
+    desc = codes.map(diagnosis_map).fillna(codes)
+    desc = desc.where(desc.str.len() <= 50, desc.str.slice(0, 50) + "...")
+    return [[outcome, code, description, n, d, f"{rate:.1f}"]
+            for code, description, n, d, rate in zip(
+                top.index, desc.tolist(), top['n'].astype(int).tolist(),
+                top['d'].astype(int).tolist(), (top['rate'] * 100).tolist())]
+
 def create_table_2():
     """Create Table 2: Top diagnoses associated with bounce-back"""
     
@@ -99,16 +114,16 @@ def create_table_2():
         print("Missing diagnosis data files")
         return
     
-    df_ed = pd.read_csv(ed_diag_file, index_col=0)
-    df_readmit = pd.read_csv(readmit_diag_file, index_col=0)
+    df_ed = load_summary(ed_diag_file, index_col=0)
+    df_readmit = load_summary(readmit_diag_file, index_col=0)
     
     # Filter for meaningful sample sizes
-    df_ed_filtered = df_ed[(df_ed['d'] >= 10) & (df_ed['n'] >= 2)].copy()
-    df_readmit_filtered = df_readmit[(df_readmit['d'] >= 10) & (df_readmit['n'] >= 2)].copy()
+    df_ed_filtered = filter_meaningful(df_ed).copy()
+    df_readmit_filtered = filter_meaningful(df_readmit).copy()
     
     # Get top 10 for each
-    top_ed = df_ed_filtered.sort_values('rate', ascending=False).head(10)
-    top_readmit = df_readmit_filtered.sort_values('rate', ascending=False).head(10)
+    top_ed = df_ed_filtered.nlargest(10, 'rate')
+    top_readmit = df_readmit_filtered.nlargest(10, 'rate')
     
     # Try to load diagnosis descriptions
     diagnosis_map = {}
@@ -123,29 +138,11 @@ def create_table_2():
     
     # ED bounce-back section
     results.append(['SECTION', 'ED Revisit (Top 10)', '', '', '', ''])
-    for idx, row in top_ed.iterrows():
-        description = diagnosis_map.get(idx, idx)[:50] + "..." if len(diagnosis_map.get(idx, idx)) > 50 else diagnosis_map.get(idx, idx)
-        results.append([
-            'ED',
-            idx,
-            description,
-            int(row['n']),
-            int(row['d']),
-            f"{row['rate']*100:.1f}"
-        ])
+    results += _diagnosis_rows('ED', top_ed, diagnosis_map)
     
     # Readmission section
     results.append(['SECTION', 'Bounce Back Admission (Top 10)', '', '', '', ''])
-    for idx, row in top_readmit.iterrows():
-        description = diagnosis_map.get(idx, idx)[:50] + "..." if len(diagnosis_map.get(idx, idx)) > 50 else diagnosis_map.get(idx, idx)
-        results.append([
-            'Readmit',
-            idx,
-            description,
-            int(row['n']),
-            int(row['d']),
-            f"{row['rate']*100:.1f}"
-        ])
+    results += _diagnosis_rows('Readmit', top_readmit, diagnosis_map)
     
     # Create DataFrame
     table2_df = pd.DataFrame(results, columns=[
@@ -155,18 +152,22 @@ def create_table_2():
     table2_df.to_csv(OUT / "table2_top_diagnoses.csv", index=False)
     
     # Create formatted version
+    lines = ["Table 2. Top Diagnoses Associated with Bounce-back Events", "=" * 80, ""]
+    
+    for outcome, code, description, events, total, rate in table2_df.itertuples(index=False, name=None):
+        if outcome == 'SECTION':
+            lines += [
+                "",
+                code,
+                "-" * 40,
+                f"{'ICD Code':<12} {'Description':<35} {'Events':>8} {'Total':>8} {'Rate%':>8}",
+                "-" * 80,
+            ]
+        else:
+            lines.append(f"{code:<12} {description:<35} {events:>8} {total:>8} {rate:>8}")
+    
     with open(OUT / "table2_formatted.txt", 'w') as f:
-        f.write("Table 2. Top Diagnoses Associated with Bounce-back Events\n")
-        f.write("=" * 80 + "\n\n")
-        
-        for _, row in table2_df.iterrows():
-            if row['Outcome_Type'] == 'SECTION':
-                f.write(f"\n{row['ICD_Code']}\n")
-                f.write("-" * 40 + "\n")
-                f.write(f"{'ICD Code':<12} {'Description':<35} {'Events':>8} {'Total':>8} {'Rate%':>8}\n")
-                f.write("-" * 80 + "\n")
-            else:
-                f.write(f"{row['ICD_Code']:<12} {row['Description']:<35} {row['Events']:>8} {row['Total']:>8} {row['Rate_Percent']:>8}\n")
+        f.write("\n".join(lines) + "\n")
     
     print("✓ Table 2 created: Top diagnoses for bounce-back events")
 
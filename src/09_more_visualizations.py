@@ -1,34 +1,50 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use('Agg')  # PNG output only; no GUI backend needed
 import matplotlib.dates as mdates
-import seaborn as sns
+import matplotlib.style
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PatchCollection
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+from cycler import cycler
 from pathlib import Path
-import warnings
-warnings.filterwarnings('ignore')
+from _io_cache import FIG_DPI, figure_status, is_up_to_date, load_summary, record_fingerprint
 
-plt.style.use('seaborn-v0_8-whitegrid')
-sns.set_palette("Set2")
+matplotlib.style.use('seaborn-v0_8-whitegrid')  # bundled with matplotlib, not seaborn
+matplotlib.rcParams['axes.prop_cycle'] = cycler(color=matplotlib.colormaps['Set2'].colors)
 
 # Paths
 CSV_DIR = Path("csv_outputs")
 OUT = Path("../figures")
 OUT.mkdir(exist_ok=True)
+# Part of every figure's fingerprint, so editing this script redraws its figures
+SCRIPT = Path(__file__)
 
 def create_patient_flow_diagram():
-    """Create a CONSORT-style patient flow diagram"""
+    """Create a CONSORT-style patient flow diagram; returns False if it was already up to date"""
+    
+    inputs = [CSV_DIR / "overlap_standard.csv", SCRIPT]
+    out = OUT / "patient_flow_diagram.png"
+    if is_up_to_date(out, *inputs):
+        return False
     
     # Load overlap data to get patient counts
-    overlap_df = pd.read_csv(CSV_DIR / "overlap_standard.csv")
+    overlap_df = load_summary(CSV_DIR / "overlap_standard.csv")
     
-    total_ed_visits = overlap_df['count'].sum()
-    ed_only = overlap_df[overlap_df['category'] == 'ed_only']['count'].sum()
-    admit_only = overlap_df[overlap_df['category'] == 'admit_only']['count'].sum()
-    both = overlap_df[overlap_df['category'] == 'both']['count'].sum()
-    neither = overlap_df[overlap_df['category'] == 'neither']['count'].sum()
+    # One pass over the table; a category missing from the file counts as zero
+    counts = overlap_df.groupby('category')['count'].sum()
+    ed_only, admit_only, both, neither = (counts.get(k, 0) for k in ('ed_only', 'admit_only', 'both', 'neither'))
+    total_ed_visits = counts.sum()
     
-    # Create figure
-    fig, ax = plt.subplots(figsize=(12, 8))
+    # Create figure (a standalone Agg figure, not registered with pyplot)
+    fig = Figure(figsize=(12, 8))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
     ax.set_xlim(0, 10)
     ax.set_ylim(0, 10)
     ax.axis('off')
@@ -42,36 +58,46 @@ def create_patient_flow_diagram():
     ax.text(5, 9.5, 'Patient Flow Diagram: ED Visits and Outcomes', 
             ha='center', va='center', fontsize=16, fontweight='bold', color=color_text)
     
+    # Outcome box geometry
+    box_width = 1.8
+    box_height = 0.8
+    y_pos = 6
+    
+    # All five boxes (main cohort, then neither / ED only / admit only / both) as one collection
+    boxes = [
+        (Rectangle((3.5, 7.5), 3, 1), color_main, color_main, 0.3, 2),
+        (Rectangle((0.5, y_pos), box_width, box_height), 'lightgray', 'gray', 0.5, 1),
+        (Rectangle((2.5, y_pos), box_width, box_height), color_outcome, color_outcome, 0.3, 2),
+        (Rectangle((4.5, y_pos), box_width, box_height), '#f39c12', '#f39c12', 0.3, 2),
+        (Rectangle((6.5, y_pos), box_width, box_height), '#9b59b6', '#9b59b6', 0.3, 2),
+    ]
+    ax.add_collection(PatchCollection(
+        [rect for rect, *_ in boxes],
+        facecolors=[to_rgba(fc, alpha) for _, fc, _, alpha, _ in boxes],
+        edgecolors=[to_rgba(ec, alpha) for _, _, ec, alpha, _ in boxes],
+        linewidths=[lw for *_, lw in boxes],
+        rasterized=True))
+    
     # Main cohort box
-    ax.add_patch(plt.Rectangle((3.5, 7.5), 3, 1, facecolor=color_main, alpha=0.3, edgecolor=color_main, linewidth=2))
     ax.text(5, 8, f'Total ED Visits\nn = {total_ed_visits:,}', 
             ha='center', va='center', fontsize=12, fontweight='bold', color=color_text)
     
     # Arrows down
     ax.annotate('', xy=(5, 7.2), xytext=(5, 7.5), arrowprops=dict(arrowstyle='->', lw=2, color=color_text))
     
-    # Outcome boxes
-    box_width = 1.8
-    box_height = 0.8
-    y_pos = 6
-    
     # Neither
-    ax.add_patch(plt.Rectangle((0.5, y_pos), box_width, box_height, facecolor='lightgray', alpha=0.5, edgecolor='gray', linewidth=1))
     ax.text(0.5 + box_width/2, y_pos + box_height/2, f'No Revisit\nor Bounce Back Admission\nn = {neither:,}\n({neither/total_ed_visits*100:.1f}%)', 
             ha='center', va='center', fontsize=10, color=color_text)
     
     # ED only
-    ax.add_patch(plt.Rectangle((2.5, y_pos), box_width, box_height, facecolor=color_outcome, alpha=0.3, edgecolor=color_outcome, linewidth=2))
     ax.text(2.5 + box_width/2, y_pos + box_height/2, f'ED Revisit\nOnly\nn = {ed_only:,}\n({ed_only/total_ed_visits*100:.1f}%)', 
             ha='center', va='center', fontsize=10, fontweight='bold', color=color_text)
     
     # Admit only
-    ax.add_patch(plt.Rectangle((4.5, y_pos), box_width, box_height, facecolor='#f39c12', alpha=0.3, edgecolor='#f39c12', linewidth=2))
     ax.text(4.5 + box_width/2, y_pos + box_height/2, f'Bounce Back Admission\nOnly\nn = {admit_only:,}\n({admit_only/total_ed_visits*100:.1f}%)', 
             ha='center', va='center', fontsize=10, fontweight='bold', color=color_text)
     
     # Both
-    ax.add_patch(plt.Rectangle((6.5, y_pos), box_width, box_height, facecolor='#9b59b6', alpha=0.3, edgecolor='#9b59b6', linewidth=2))
     ax.text(6.5 + box_width/2, y_pos + box_height/2, f'Both ED Revisit\nand Bounce Back Admission\nn = {both:,}\n({both/total_ed_visits*100:.1f}%)', 
             ha='center', va='center', fontsize=10, fontweight='bold', color=color_text)
     
@@ -97,67 +123,71 @@ def create_patient_flow_diagram():
     ax.text(5, 4, findings_text, ha='center', va='top', fontsize=11, color=color_text,
             bbox=dict(boxstyle='round,pad=0.5', facecolor='white', alpha=0.8, edgecolor='gray'))
     
-    plt.tight_layout()
-    plt.savefig(OUT / "patient_flow_diagram.png", dpi=300, bbox_inches='tight')
-    plt.close()
+    fig.tight_layout()
+    # Fixed-layout diagram: save the canvas as is rather than re-rendering to trim it
+    fig.savefig(out, dpi=FIG_DPI)
+    record_fingerprint(out, *inputs)
+    return True
 
 def create_correlation_matrix():
-    """Create a correlation matrix of key variables"""
+    """Create a correlation matrix of key variables; returns False if it was already up to date"""
+    
+    csvs = [CSV_DIR / f"{outcome}_by_{group}.csv"
+            for group in ("race", "diagnosis") for outcome in ("ed_bounceback", "readmit")]
+    inputs = csvs + [SCRIPT]
+    out = OUT / "correlation_analysis.png"
+    if is_up_to_date(out, *inputs):
+        return False
     
     # Load all available data
-    df_ed_race = pd.read_csv(CSV_DIR / "ed_bounceback_by_race.csv", index_col=0)
-    df_readmit_race = pd.read_csv(CSV_DIR / "readmit_by_race.csv", index_col=0)
-    df_ed_dx = pd.read_csv(CSV_DIR / "ed_bounceback_by_diagnosis.csv", index_col=0)
-    df_readmit_dx = pd.read_csv(CSV_DIR / "readmit_by_diagnosis.csv", index_col=0)
-    
-    # Create correlation data
-    correlation_data = []
-    
-    # Get common races and diagnoses
-    common_races = set(df_ed_race.index).intersection(set(df_readmit_race.index))
-    common_dx = set(df_ed_dx.index).intersection(set(df_readmit_dx.index))
-    
-    for race in common_races:
-        if pd.notna(df_ed_race.loc[race, 'rate']) and pd.notna(df_readmit_race.loc[race, 'rate']):
-            correlation_data.append({
-                'group': race,
-                'type': 'Race',
-                'ed_rate': df_ed_race.loc[race, 'rate'] * 100,
-                'readmit_rate': df_readmit_race.loc[race, 'rate'] * 100
-            })
-    
-    for dx in list(common_dx)[:15]:  # Top 15 diagnoses
-        if pd.notna(df_ed_dx.loc[dx, 'rate']) and pd.notna(df_readmit_dx.loc[dx, 'rate']):
-            correlation_data.append({
-                'group': dx[:30] + '...' if len(dx) > 30 else dx,  # Truncate long names
-                'type': 'Diagnosis',
-                'ed_rate': df_ed_dx.loc[dx, 'rate'] * 100,
-                'readmit_rate': df_readmit_dx.loc[dx, 'rate'] * 100
-            })
-    
-    df_corr = pd.DataFrame(correlation_data)
+    df_ed_race, df_readmit_race, df_ed_dx, df_readmit_dx = (load_summary(p, index_col=0) for p in csvs)
+    
+    # Pair up ED and readmit rates per group (inner join keeps the ED file's order)
+    race = df_ed_race[['rate']].join(df_readmit_race[['rate']], how='inner', lsuffix='_ed', rsuffix='_rd').dropna()
+    dx = df_ed_dx[['rate']].join(df_readmit_dx[['rate']], how='inner', lsuffix='_ed', rsuffix='_rd')
+    dx = dx.iloc[:15].dropna()  # Top 15 diagnoses
+    
+    # Create correlation data, one column-wise frame per group type
+    dx_labels = dx.index.astype(str)
+    race_rows = pd.DataFrame({
+        'group': race.index,
+        'type': 'Race',
+        'ed_rate': race['rate_ed'].to_numpy() * 100,
+        'readmit_rate': race['rate_rd'].to_numpy() * 100
+    })
+    dx_rows = pd.DataFrame({
+        # Truncate long names
+        'group': dx_labels.where(dx_labels.str.len() <= 30, dx_labels.str[:30] + '...'),
+        'type': 'Diagnosis',
+        'ed_rate': dx['rate_ed'].to_numpy() * 100,
+        'readmit_rate': dx['rate_rd'].to_numpy() * 100
+    })
+    df_corr = pd.concat([race_rows, dx_rows], ignore_index=True)
     
     # Create scatter plot with correlation
-    fig, ax = plt.subplots(figsize=(12, 8))
-    
-    # Color by type
-    race_data = df_corr[df_corr['type'] == 'Race']
-    dx_data = df_corr[df_corr['type'] == 'Diagnosis']
+    fig = Figure(figsize=(12, 8))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
     
-    if len(race_data) > 0:
-        ax.scatter(race_data['ed_rate'], race_data['readmit_rate'], 
+    # Color by type, straight from the per-type frames
+    if len(race_rows) > 0:
+        ax.scatter(race_rows['ed_rate'].to_numpy(), race_rows['readmit_rate'].to_numpy(), 
                   s=100, alpha=0.7, color='#e74c3c', label='Race/Ethnicity', marker='o')
     
-    if len(dx_data) > 0:
-        ax.scatter(dx_data['ed_rate'], dx_data['readmit_rate'], 
+    if len(dx_rows) > 0:
+        ax.scatter(dx_rows['ed_rate'].to_numpy(), dx_rows['readmit_rate'].to_numpy(), 
                   s=80, alpha=0.7, color='#3498db', label='Diagnosis', marker='s')
     
     # Calculate and plot correlation line
     if len(df_corr) > 1:
-        correlation = np.corrcoef(df_corr['ed_rate'], df_corr['readmit_rate'])[0, 1]
-        z = np.polyfit(df_corr['ed_rate'], df_corr['readmit_rate'], 1)
-        p = np.poly1d(z)
-        ax.plot(df_corr['ed_rate'], p(df_corr['ed_rate']), "r--", alpha=0.8, linewidth=2)
+        ed_arr = df_corr['ed_rate'].to_numpy(np.float64)
+        re_arr = df_corr['readmit_rate'].to_numpy(np.float64)
+        correlation = np.corrcoef(ed_arr, re_arr)[0, 1]
+        # Least-squares line in closed form: slope = r * sd(y) / sd(x)
+        slope = correlation * re_arr.std() / ed_arr.std()
+        intercept = re_arr.mean() - slope * ed_arr.mean()
+        ed_ends = np.array([ed_arr.min(), ed_arr.max()])
+        ax.plot(ed_ends, intercept + slope * ed_ends, "r--", alpha=0.8, linewidth=2)
         
         # Add correlation text
         ax.text(0.05, 0.95, f'Pearson r = {correlation:.3f}', 
@@ -177,41 +207,55 @@ def create_correlation_matrix():
     ax.plot([0, max_val], [0, max_val], 'k--', alpha=0.3, linewidth=1)
     ax.text(max_val*0.8, max_val*0.9, 'Equal rates', rotation=45, alpha=0.5, fontsize=10)
     
-    plt.tight_layout()
-    plt.savefig(OUT / "correlation_analysis.png", dpi=300, bbox_inches='tight')
-    plt.close()
+    fig.tight_layout()
+    fig.savefig(out, dpi=FIG_DPI)
+    record_fingerprint(out, *inputs)
+    return True
 
 def create_statistical_summary_table():
-    """Create a publication-ready summary statistics table"""
+    """Create a publication-ready summary statistics table; returns False if it was already up to date"""
+    
+    inputs = [CSV_DIR / "overlap_standard.csv", CSV_DIR / "ed_bounceback_by_race.csv",
+              CSV_DIR / "readmit_by_race.csv", SCRIPT]
+    out = OUT / "summary_statistics_table.png"
+    if is_up_to_date(out, *inputs):
+        return False
     
     # Load overlap data
-    overlap_df = pd.read_csv(CSV_DIR / "overlap_standard.csv")
-    total_visits = overlap_df['count'].sum()
+    overlap_df = load_summary(CSV_DIR / "overlap_standard.csv")
+    counts = overlap_df.groupby('category')['count'].sum()
+    total_visits = counts.sum()
     
     # Load race data
-    df_ed_race = pd.read_csv(CSV_DIR / "ed_bounceback_by_race.csv", index_col=0)
-    df_readmit_race = pd.read_csv(CSV_DIR / "readmit_by_race.csv", index_col=0)
+    df_ed_race = load_summary(CSV_DIR / "ed_bounceback_by_race.csv", index_col=0)
+    df_readmit_race = load_summary(CSV_DIR / "readmit_by_race.csv", index_col=0)
     
     # Calculate summary statistics
     summary_stats = {
         'Total ED Visits': f"{total_visits:,}",
-        'ED Revisit Rate': f"{(overlap_df[overlap_df['category'].isin(['ed_only', 'both'])]['count'].sum() / total_visits * 100):.1f}%",
-        'Bounce Back Admission Rate': f"{(overlap_df[overlap_df['category'].isin(['admit_only', 'both'])]['count'].sum() / total_visits * 100):.1f}%",
-        'Overlap Rate': f"{(overlap_df[overlap_df['category'] == 'both']['count'].sum() / total_visits * 100):.1f}%",
+        'ED Revisit Rate': f"{((counts.get('ed_only', 0) + counts.get('both', 0)) / total_visits * 100):.1f}%",
+        'Bounce Back Admission Rate': f"{((counts.get('admit_only', 0) + counts.get('both', 0)) / total_visits * 100):.1f}%",
+        'Overlap Rate': f"{(counts.get('both', 0) / total_visits * 100):.1f}%",
         'Mean ED Revisit Rate by Race': f"{df_ed_race['rate'].mean() * 100:.1f}% ± {df_ed_race['rate'].std() * 100:.1f}%",
         'Mean Bounce Back Rate by Race': f"{df_readmit_race['rate'].mean() * 100:.1f}% ± {df_readmit_race['rate'].std() * 100:.1f}%"
     }
     
     # Create table visualization
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
     ax.axis('tight')
     ax.axis('off')
     
     # Create table data
     table_data = [[key, value] for key, value in summary_stats.items()]
     
+    # Alternate row shading and the header colour are passed to ax.table up front
+    row_colours = [['#f8f9fa' if i % 2 == 0 else 'white'] * 2 for i in range(1, len(table_data) + 1)]
     table = ax.table(cellText=table_data,
                     colLabels=['Metric', 'Value'],
+                    cellColours=row_colours,
+                    colColours=['#3498db'] * 2,
                     cellLoc='left',
                     loc='center',
                     colWidths=[0.7, 0.3])
@@ -220,42 +264,51 @@ def create_statistical_summary_table():
     table.set_fontsize(12)
     table.scale(1.2, 1.5)
     
-    # Style the table
-    for i in range(len(table_data) + 1):
-        for j in range(2):
-            cell = table[(i, j)]
-            if i == 0:  # Header
-                cell.set_facecolor('#3498db')
-                cell.set_text_props(weight='bold', color='white')
-            else:
-                cell.set_facecolor('#f8f9fa' if i % 2 == 0 else 'white')
-                cell.set_text_props(weight='bold' if j == 0 else 'normal')
+    # Bold header (white on blue) and metric names
+    for (i, j), cell in table.get_celld().items():
+        if i == 0:
+            cell.set_text_props(weight='bold', color='white')
+        elif j == 0:
+            cell.set_text_props(weight='bold')
     
     ax.set_title('Summary Statistics: ED Revisit and Bounce Back Admission Analysis', 
                 fontsize=16, fontweight='bold', pad=20)
     
-    plt.tight_layout()
-    plt.savefig(OUT / "summary_statistics_table.png", dpi=300, bbox_inches='tight')
-    plt.close()
+    fig.tight_layout()
+    fig.savefig(out, dpi=FIG_DPI)
+    record_fingerprint(out, *inputs)
+    return True
+
+def main(parallel=False):
+    """Generate all visualizations.
 
-def main():
-    """Generate all visualizations"""
+    With parallel=True the three figures render in worker processes; this needs
+    the module to be importable by the workers, so it is only used when the
+    script is run directly.
+    """
     print("Creating visualizations...")
     
+    # Independent figures: each reads its own CSVs and writes its own PNG
+    tasks = [
+        (create_patient_flow_diagram, "Patient flow diagram"),
+        (create_correlation_matrix, "Correlation analysis"),
+        (create_statistical_summary_table, "Summary statistics table"),
+    ]
+    
     try:
-        create_patient_flow_diagram()
-        print("✓ Patient flow diagram created")
-        
-        create_correlation_matrix()
-        print("✓ Correlation analysis created")
-        
-        create_statistical_summary_table()
-        print("✓ Summary statistics table created")
+        if parallel:
+            with ProcessPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1)) as ex:
+                futures = [ex.submit(func) for func, _ in tasks]
+                for future, (_, name) in zip(futures, tasks):
+                    print(figure_status(name, future.result()))
+        else:
+            for func, name in tasks:
+                print(figure_status(name, func()))
         
         print(f"\nAll visualizations saved to: {OUT.absolute()}")
         
         # List all generated files
-        plot_files = list(OUT.glob("*.png"))
+        plot_files = {p.name for p in OUT.glob("*.png")}
         if plot_files:
             print("\nGenerated plots:")
             plots = [
@@ -264,7 +317,7 @@ def main():
                 "summary_statistics_table.png"
             ]
             for plot in plots:
-                if (OUT / plot).exists():
+                if plot in plot_files:
                     print(f"  - {plot}")
         
     except Exception as e:
@@ -273,4 +326,4 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main()
+    main(parallel=True)
@@ -0,0 +1,120 @@
+# src/_io_cache.py
+"""Shared helpers for the scripts that read the summary tables written by 04_bounce_back.py"""
+
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+import pandas as pd
+
+# Event/visit counts fit comfortably in int32. Rates stay float64: they are reported
+# to 0.1% and float32 can flip the rounding of values on a .x5 boundary.
+SUMMARY_DTYPES = {'count': 'int32', 'n': 'int32', 'd': 'int32'}
+
+# Re-render every figure even if its inputs are unchanged
+FORCE_REPLOT = os.environ.get("FORCE_REPLOT", "0") not in {"0","false","False"}
+# Output resolution for every figure; raise it (e.g. FIG_DPI=300) for print-quality
+# figures (a changed value redraws existing PNGs)
+FIG_DPI = int(os.environ.get("FIG_DPI", 150))
+
+@lru_cache(maxsize=None)
+def _load(path, mtime_ns, index_col, usecols):
+    # mtime_ns is only part of the key, so a table rewritten by 04 is read again
+    if path.suffix == ".parquet":
+        df = pd.read_parquet(path, engine="pyarrow")
+        # 04 groups on categoricals; hand back plain labels as read_csv would
+        if isinstance(df.index, pd.CategoricalIndex):
+            df.index = pd.Index(df.index.to_numpy(), name=df.index.name)
+        if index_col is None and not isinstance(df.index, pd.RangeIndex):
+            df = df.reset_index()
+        if usecols is not None:
+            df = df[[c for c in df.columns if c in usecols]]
+        return df.astype({c: t for c, t in SUMMARY_DTYPES.items() if c in df.columns})
+    return pd.read_csv(path, index_col=index_col, usecols=None if usecols is None else list(usecols), dtype=SUMMARY_DTYPES)
+
+def load_summary(csv_path, index_col=None, usecols=None):
+    """Read a summary table once per run, preferring the Parquet copy next to the CSV.
+
+    The Parquet file is used only if it is at least as new as the CSV. `usecols` (a tuple
+    of column names, for tables read without index_col) limits the columns returned.
+    Repeat calls return the cached frame (copy before mutating) until the file changes.
+    """
+    csv_path = Path(csv_path)
+    pq_path = csv_path.with_suffix(".parquet")
+    try:
+        pq_mtime = pq_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        pq_mtime = None
+    try:
+        csv_mtime = csv_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        csv_mtime = None
+    if pq_mtime is not None and (csv_mtime is None or pq_mtime >= csv_mtime):
+        return _load(pq_path, pq_mtime, index_col, usecols)
+    return _load(csv_path, csv_mtime, index_col, usecols)
+
+# Row count above which filter_meaningful goes through DataFrame.query
+QUERY_MIN_ROWS = 1024
+
+def filter_meaningful(df):
+    """Groups (diagnoses) with at least 10 cases and 2 events.
+
+    Tables above QUERY_MIN_ROWS rows are filtered with DataFrame.query, which pandas
+    evaluates with numexpr if it happens to be installed (it is not a requirement).
+    The summary tables 04 writes today are far smaller, so in practice the plain
+    boolean mask is used; the query path is only for much larger (e.g. pooled) inputs.
+    """
+    if len(df) > QUERY_MIN_ROWS:
+        return df.query('d >= 10 and n >= 2')
+    return df[(df['d'] >= 10) & (df['n'] >= 2)]
+
+def load_summaries(csv_dir, index_cols):
+    """Load each summary named in `index_cols` (file name -> index_col) that exists in `csv_dir`.
+
+    One scandir of the directory replaces an exists() check per file; missing tables are
+    left out of the returned dict.
+    """
+    try:
+        with os.scandir(csv_dir) as entries:
+            available = {e.name for e in entries}
+    except FileNotFoundError:
+        available = set()
+    return {name: load_summary(Path(csv_dir) / name, index_col)
+            for name, index_col in index_cols.items()
+            if name in available or Path(name).with_suffix(".parquet").name in available}
+
+def _fingerprint(inputs):
+    """Hash of each input's path, size and mtime_ns, plus FIG_DPI"""
+    entries = []
+    for p in inputs:
+        try:
+            st = os.stat(p)
+            entries.append((str(p), st.st_size, st.st_mtime_ns))
+        except FileNotFoundError:
+            entries.append((str(p), None, None))
+    return hashlib.sha1(repr((entries, FIG_DPI)).encode()).hexdigest()
+
+def _fingerprint_path(out):
+    return out.with_name(out.name + ".fp")
+
+def is_up_to_date(out, *inputs):
+    """True if `out` exists and was rendered from exactly these inputs at the current FIG_DPI.
+
+    Compares against the `<png>.fp` sidecar written by record_fingerprint(); a missing
+    sidecar (e.g. a fresh checkout) counts as out of date. Pass the plotting script
+    itself as an input so code changes also trigger a redraw.
+    """
+    if FORCE_REPLOT or not out.exists():
+        return False
+    try:
+        return _fingerprint_path(out).read_text() == _fingerprint(inputs)
+    except FileNotFoundError:
+        return False
+
+def record_fingerprint(out, *inputs):
+    """Write the `<png>.fp` sidecar for a freshly saved `out` (see is_up_to_date)"""
+    _fingerprint_path(out).write_text(_fingerprint(inputs))
+
+def figure_status(name, rendered):
+    """Progress line for a plot step that returns whether it redrew anything"""
+    return f"✓ {name} created" if rendered else f"- {name} skipped (up to date)"
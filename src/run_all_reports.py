@@ -0,0 +1,24 @@
+# src/run_all_reports.py
+"""Run the report, table and extra-figure steps (07-09) in one interpreter.
+
+All three read csv_outputs/ through the cached loader in _io_cache, so each summary
+table is parsed once per run instead of once per script.
+"""
+
+import importlib.util
+from pathlib import Path
+
+def load_script(filename):
+    """Load a sibling script by path (names start with a digit)"""
+    spec = importlib.util.spec_from_file_location(Path(filename).stem, Path(__file__).with_name(filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def main():
+    load_script("07_generate_report.py").generate_report()
+    load_script("08_create_table.py").main()
+    load_script("09_more_visualizations.py").main()
+
+if __name__ == "__main__":
+    main()